@@ -1,15 +1,39 @@
-import tkinter as tk
-from tkinter import messagebox, filedialog, scrolledtext, ttk
-from tkinterweb import HtmlFrame
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
 import requests
 import threading
+import queue
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 import json
 import os
 import csv
+import bisect
+import collections
+import contextlib
+import functools
+import gzip
+import hashlib
+import math
+import re
 import sqlite3
-from datetime import datetime
+import sys
+from datetime import datetime, timedelta
 import logging
+from pathlib import Path
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is an optional speed-up
+    etree = None
+
+# tkinter is only imported when the GUI is started; see _load_tk()
+tk = messagebox = filedialog = scrolledtext = ttk = None
 
 SETTINGS_FILE = "settings.json"
 DB_FILE = "orders.db"
@@ -21,6 +45,10 @@ WORKSTATIONS = [
     "Shipping",
 ]
 
+def configured_workstations(settings):
+    """Return the ``workstations`` of ``settings``, in process order."""
+    return tuple(settings.get("workstations") or WORKSTATIONS)
+
 def load_settings():
     if os.path.exists(SETTINGS_FILE):
         with open(SETTINGS_FILE, "r") as f:
@@ -31,180 +59,1789 @@ def save_settings(settings):
     with open(SETTINGS_FILE, "w") as f:
         json.dump(settings, f)
 
-class YBSScraperApp:
-    def __init__(self, root):
-        self.root = root
-        root.title("YBS Order Scraper")
-        self.settings = load_settings()
+def _load_tk():
+    """Import tkinter on first use so headless runs never load it."""
+    global tk, messagebox, filedialog, scrolledtext, ttk
+    if tk is None:
+        import tkinter
+        from tkinter import filedialog, messagebox, scrolledtext, ttk
+
+        tk = tkinter
+
+def _column_name(text):
+    return " ".join(text.split()).casefold()
+
+def positional_columns(workstations=WORKSTATIONS):
+    """Return the column map of a table without a header: the last cells."""
+    return tuple(range(-len(workstations), 0))
+
+@functools.lru_cache(maxsize=32)
+def _header_columns(header, workstations):
+    names = [_column_name(text) for text in header]
+    return tuple(
+        names.index(_column_name(ws)) if _column_name(ws) in names else None
+        for ws in workstations
+    )
+
+def column_map(header, workstations=tuple(WORKSTATIONS)):
+    """Return the cell index of each of ``workstations`` in a table ``header``.
+
+    ``header`` is the tuple of ``<th>`` texts; names are compared ignoring
+    case and spacing, and the lookup is cached per distinct layout. Unless
+    every workstation is found the header is not trusted: the mismatch is
+    logged, on every page it appears on, and the positional map is returned
+    as for a table without a header.
+    """
+    columns = _header_columns(header, workstations)
+    missing = [ws for ws, index in zip(workstations, columns) if index is None]
+    if missing:
+        logging.warning(
+            "Workstations not found in the table header (%s): %s; reading cells by position",
+            " | ".join(header),
+            ", ".join(missing),
+        )
+        return positional_columns(workstations)
+    ignored = [text for index, text in enumerate(header[1:], 1) if index not in columns]
+    if ignored:
+        logging.debug("Ignoring table columns: %s", ", ".join(ignored))
+    return columns
+
+def _order_row(cols, columns):
+    """Return ``(order_num, timestamps)`` for the cells of a table row.
+
+    ``columns`` is the index of each workstation's cell, as returned by
+    :func:`column_map`; cells beyond the row read as empty. Rows that do not
+    describe a YBS order yield ``None``.
+    """
+    if not cols or not cols[0].startswith("YBS"):
+        return None
+    parts = cols[0].split()
+    if len(parts) < 2:
+        logging.warning("Unexpected row format: %s", cols[0])
+        return None
+    width = len(cols)
+    return parts[1], [
+        cols[i] if i is not None and -width <= i < width else "" for i in columns
+    ]
+
+def extract_rows_bs4(html, workstations=WORKSTATIONS):
+    """Yield order rows from ``html`` using a full BeautifulSoup tree."""
+    workstations = tuple(workstations)
+    table = columns = None
+    soup = BeautifulSoup(html, "html.parser")
+    for row in soup.find_all("tr"):
+        parent = row.find_parent("table")
+        if columns is None or parent is not table:
+            # every table starts without a header of its own
+            table = parent
+            columns = positional_columns(workstations)
+        cells = row.find_all(["td", "th"])
+        texts = [col.get_text(strip=True) for col in cells]
+        if cells and cells[0].name == "th":
+            columns = column_map(tuple(texts), workstations)
+            continue
+        item = _order_row(texts, columns)
+        if item:
+            yield item
+
+class _RowParser(HTMLParser):
+    """Collect the cell texts of each ``<tr>`` as the document streams in.
+
+    Text is joined the same way as ``get_text(strip=True)``. A row starting
+    with a ``<th>`` is a header and sets ``columns`` until the table ends.
+    Once the first cell of any other row turns out not to start with ``YBS``
+    the rest of the row is ignored.
+    """
+
+    def __init__(self, workstations=WORKSTATIONS):
+        super().__init__()
+        self.workstations = tuple(workstations)
+        self.columns = positional_columns(self.workstations)
+        self.rows = []
+        self._cells = None
+        self._fragments = None
+        self._data = []
+        self._skip = False
+        self._header = False
+
+    def _flush_data(self):
+        if self._data:
+            if self._fragments is not None:
+                text = "".join(self._data).strip()
+                if text:
+                    self._fragments.append(text)
+            self._data = []
+
+    def _end_cell(self):
+        if self._fragments is None:
+            return
+        self._cells.append("".join(self._fragments))
+        self._fragments = None
+        if len(self._cells) == 1 and not self._header and not self._cells[0].startswith("YBS"):
+            self._skip = True
+
+    def _end_row(self):
+        self._end_cell()
+        if self._cells and self._header:
+            self.columns = column_map(tuple(self._cells), self.workstations)
+        elif self._cells and not self._skip:
+            item = _order_row(self._cells, self.columns)
+            if item:
+                self.rows.append(item)
+        self._cells = None
+        self._skip = False
+        self._header = False
+
+    def handle_starttag(self, tag, attrs):
+        self._flush_data()
+        if tag == "tr":
+            if self._cells is not None:
+                self._end_row()
+            self._cells = []
+        elif tag == "table":
+            if self._cells is not None:
+                self._end_row()
+            self.columns = positional_columns(self.workstations)
+        elif tag in ("td", "th") and self._cells is not None and not self._skip:
+            self._end_cell()
+            if not self._cells:
+                self._header = tag == "th"
+            self._fragments = []
+
+    def handle_endtag(self, tag):
+        self._flush_data()
+        if tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr" and self._cells is not None:
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._fragments is not None:
+            self._data.append(data)
+
+    def handle_comment(self, data):
+        # comments split text nodes but contribute no text
+        self._flush_data()
+
+    def close(self):
+        super().close()
+        self._flush_data()
+        if self._cells is not None:
+            self._end_row()
+
+def _chunks(html, size=65536):
+    for start in range(0, len(html), size):
+        yield html[start : start + size]
+
+def extract_rows_stream(html, workstations=WORKSTATIONS):
+    """Yield order rows from ``html`` with the stdlib parser, without a tree."""
+    parser = _RowParser(workstations)
+    for chunk in _chunks(html):
+        parser.feed(chunk)
+        yield from parser.rows
+        parser.rows = []
+    parser.close()
+    yield from parser.rows
+
+def extract_rows_lxml(html, workstations=WORKSTATIONS):
+    """Yield order rows from ``html`` using lxml's incremental HTML parser."""
+    workstations = tuple(workstations)
+    columns = positional_columns(workstations)
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=("table", "tr"))
+
+    def drain():
+        nonlocal columns
+        for event, row in parser.read_events():
+            if row.tag == "table":
+                if event == "start":
+                    columns = positional_columns(workstations)
+                continue
+            if event == "start":
+                continue
+            cells = list(row.iter("td", "th"))
+            cols = ["".join(t.strip() for t in td.itertext(tag=etree.Element)) for td in cells]
+            header = bool(cells) and cells[0].tag == "th"
+            # free rows we have already handled
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+            if header:
+                columns = column_map(tuple(cols), workstations)
+                continue
+            item = _order_row(cols, columns)
+            if item:
+                yield item
+
+    for chunk in _chunks(html):
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+ROW_EXTRACTORS = {
+    "bs4": extract_rows_bs4,
+    "stream": extract_rows_stream,
+}
+if etree is not None:
+    ROW_EXTRACTORS["lxml"] = extract_rows_lxml
+
+def extract_rows(html, engine=None, workstations=WORKSTATIONS):
+    """Yield ``(order_num, timestamps)`` for each order row in ``html``.
+
+    ``timestamps`` holds the cell of each of ``workstations``, found through
+    the table header (see :func:`column_map`) or, for a table without one,
+    in the last cells of the row. ``engine`` names one of
+    ``ROW_EXTRACTORS``. By default lxml is used when it is installed and the
+    streaming stdlib parser otherwise.
+    """
+    if engine is None:
+        engine = "lxml" if "lxml" in ROW_EXTRACTORS else "stream"
+    extractor = ROW_EXTRACTORS.get(engine)
+    if extractor is None:
+        logging.warning("Unknown row parser %r, using BeautifulSoup", engine)
+        extractor = extract_rows_bs4
+    return extractor(html, workstations)
+
+# Formats indexed by (four digit year, seconds, AM/PM) as found by _DATETIME_RE.
+DATETIME_FORMATS = {
+    (False, False, False): "%m/%d/%y %H:%M",
+    (False, True, False): "%m/%d/%y %H:%M:%S",
+    (False, False, True): "%m/%d/%y %I:%M %p",
+    (False, True, True): "%m/%d/%y %I:%M:%S %p",
+    (True, False, False): "%m/%d/%Y %H:%M",
+    (True, True, False): "%m/%d/%Y %H:%M:%S",
+    (True, False, True): "%m/%d/%Y %I:%M %p",
+    (True, True, True): "%m/%d/%Y %I:%M:%S %p",
+}
+_DATETIME_RE = re.compile(
+    r"\d{1,2}/\d{1,2}/(?:(\d{4})|\d{2})\s+\d{1,2}:\d{1,2}(:\d{1,2})?(\s+[AaPp][Mm])?\Z"
+)
+
+# big enough for every timestamp on a page of ~20k orders; a smaller cache is
+# cycled through on every poll and never hits
+@functools.lru_cache(maxsize=65536)
+def _parse_datetime(text):
+    """Return ``text`` as a ``datetime`` or ``None``; results are cached."""
+    match = _DATETIME_RE.match(text)
+    if not match:
+        return None
+    year, seconds, ampm = match.groups()
+    fmt = DATETIME_FORMATS[(year is not None, seconds is not None, ampm is not None)]
+    try:
+        return datetime.strptime(text, fmt)
+    except ValueError:
+        # e.g. month 13 or "14:30 PM"
+        return None
+
+# Each entry upgrades the schema by one ``PRAGMA user_version``. Never edit a
+# released migration; append a new one instead.
+SCHEMA_MIGRATIONS = [
+    # 1: the original tables (may already exist in databases from before
+    # migrations were tracked)
+    """
+    CREATE TABLE IF NOT EXISTS events (
+        order_num TEXT,
+        workstation TEXT,
+        timestamp TEXT,
+        UNIQUE(order_num, workstation, timestamp)
+    );
+    CREATE TABLE IF NOT EXISTS current_orders (
+        order_num TEXT PRIMARY KEY,
+        indigo TEXT,
+        laminate TEXT,
+        die_cutting_abg TEXT,
+        machine_glue TEXT,
+        shipping TEXT,
+        last_seen TEXT,
+        active INTEGER DEFAULT 1
+    );
+    """,
+    # 2: indexes for the log, last record and order views
+    """
+    CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events(timestamp);
+    CREATE INDEX IF NOT EXISTS idx_events_order_ts ON events(order_num, timestamp);
+    """,
+    # 3: time each event's stage lasted, kept up to date by write_orders
+    """
+    CREATE TABLE IF NOT EXISTS stage_durations (
+        order_num TEXT NOT NULL,
+        workstation TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        hours REAL,
+        PRIMARY KEY (order_num, timestamp, workstation)
+    ) WITHOUT ROWID;
+    INSERT OR IGNORE INTO stage_durations(order_num, workstation, timestamp, hours)
+    SELECT order_num, workstation, timestamp,
+           (strftime('%s', LEAD(timestamp) OVER w) - strftime('%s', timestamp)) / 3600.0
+    FROM events
+    WINDOW w AS (PARTITION BY order_num ORDER BY timestamp, workstation);
+    """,
+    # 4: covering indexes for the station analytics
+    """
+    CREATE INDEX IF NOT EXISTS idx_stage_durations_ws_hours
+        ON stage_durations(workstation, hours, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_events_timestamp_ws ON events(timestamp, workstation);
+    DROP INDEX IF EXISTS idx_events_timestamp;
+    """,
+    # 5: a site column for multi-site tracking; SQLite cannot change keys in
+    # place, so the tables are rebuilt and existing rows go to the default site
+    """
+    CREATE TABLE events_new (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT,
+        workstation TEXT,
+        timestamp TEXT,
+        UNIQUE(order_num, site, timestamp, workstation)
+    );
+    INSERT INTO events_new(order_num, workstation, timestamp)
+    SELECT order_num, workstation, timestamp FROM events;
+    DROP TABLE events;
+    ALTER TABLE events_new RENAME TO events;
+    CREATE INDEX idx_events_timestamp_ws ON events(timestamp, workstation);
+
+    CREATE TABLE current_orders_new (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        indigo TEXT,
+        laminate TEXT,
+        die_cutting_abg TEXT,
+        machine_glue TEXT,
+        shipping TEXT,
+        last_seen TEXT,
+        active INTEGER DEFAULT 1,
+        PRIMARY KEY (order_num, site)
+    );
+    INSERT INTO current_orders_new(order_num, indigo, laminate, die_cutting_abg,
+                                   machine_glue, shipping, last_seen, active)
+    SELECT order_num, indigo, laminate, die_cutting_abg, machine_glue, shipping,
+           last_seen, active
+    FROM current_orders;
+    DROP TABLE current_orders;
+    ALTER TABLE current_orders_new RENAME TO current_orders;
+
+    CREATE TABLE stage_durations_new (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        workstation TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        hours REAL,
+        PRIMARY KEY (order_num, site, timestamp, workstation)
+    ) WITHOUT ROWID;
+    INSERT INTO stage_durations_new(order_num, workstation, timestamp, hours)
+    SELECT order_num, workstation, timestamp, hours FROM stage_durations;
+    DROP TABLE stage_durations;
+    ALTER TABLE stage_durations_new RENAME TO stage_durations;
+    CREATE INDEX idx_stage_durations_ws_hours
+        ON stage_durations(workstation, hours, timestamp);
+    """,
+    # 6: find the orders due for archiving without scanning the active ones
+    """
+    CREATE INDEX IF NOT EXISTS idx_current_orders_inactive
+        ON current_orders(last_seen) WHERE active=0;
+    """,
+    # 7: a change log of current_orders so views can follow it incrementally;
+    # AUTOINCREMENT keeps sequence numbers rising even after pruning
+    """
+    CREATE TABLE order_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_num TEXT NOT NULL,
+        site TEXT NOT NULL,
+        kind TEXT NOT NULL
+    );
+    CREATE TRIGGER current_orders_inserted AFTER INSERT ON current_orders
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'insert');
+    END;
+    -- last_seen moves on every poll and is not a change
+    CREATE TRIGGER current_orders_updated AFTER UPDATE ON current_orders
+    WHEN OLD.indigo IS NOT NEW.indigo OR OLD.laminate IS NOT NEW.laminate
+      OR OLD.die_cutting_abg IS NOT NEW.die_cutting_abg
+      OR OLD.machine_glue IS NOT NEW.machine_glue OR OLD.shipping IS NOT NEW.shipping
+      OR OLD.active IS NOT NEW.active
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'update');
+    END;
+    CREATE TRIGGER current_orders_deleted AFTER DELETE ON current_orders
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(OLD.order_num, OLD.site, 'delete');
+    END;
+    """,
+    # 8: one row per order and completed station instead of a column per
+    # station, so new stations need no schema change; the primary key covers
+    # every lookup by order. current_orders keeps only the order itself and
+    # is rebuilt, which drops its triggers and index.
+    """
+    CREATE TABLE order_stations (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        workstation TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        PRIMARY KEY (order_num, site, workstation)
+    ) WITHOUT ROWID;
+    INSERT INTO order_stations(site, order_num, workstation, timestamp)
+    SELECT site, order_num, 'Indigo', indigo FROM current_orders WHERE indigo IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Laminate', laminate FROM current_orders WHERE laminate IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Die Cutting ABG', die_cutting_abg FROM current_orders
+    WHERE die_cutting_abg IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Machine Glue', machine_glue FROM current_orders
+    WHERE machine_glue IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Shipping', shipping FROM current_orders WHERE shipping IS NOT NULL;
+
+    CREATE TABLE current_orders_new (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        last_seen TEXT,
+        active INTEGER DEFAULT 1,
+        PRIMARY KEY (order_num, site)
+    );
+    INSERT INTO current_orders_new(site, order_num, last_seen, active)
+    SELECT site, order_num, last_seen, active FROM current_orders;
+    DROP TABLE current_orders;
+    ALTER TABLE current_orders_new RENAME TO current_orders;
+    CREATE INDEX idx_current_orders_inactive ON current_orders(last_seen) WHERE active=0;
+
+    CREATE TRIGGER current_orders_inserted AFTER INSERT ON current_orders
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'insert');
+    END;
+    -- last_seen moves on every poll and is not a change
+    CREATE TRIGGER current_orders_updated AFTER UPDATE OF active ON current_orders
+    WHEN OLD.active IS NOT NEW.active
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'update');
+    END;
+    CREATE TRIGGER current_orders_deleted AFTER DELETE ON current_orders
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(OLD.order_num, OLD.site, 'delete');
+    END;
+    CREATE TRIGGER order_stations_inserted AFTER INSERT ON order_stations
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'update');
+    END;
+    CREATE TRIGGER order_stations_updated AFTER UPDATE ON order_stations
+    WHEN OLD.timestamp IS NOT NEW.timestamp
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(NEW.order_num, NEW.site, 'update');
+    END;
+    CREATE TRIGGER order_stations_deleted AFTER DELETE ON order_stations
+    BEGIN
+        INSERT INTO order_changes(order_num, site, kind) VALUES(OLD.order_num, OLD.site, 'update');
+    END;
+    """,    # 9: the active orders, which the station analytics read on every refresh
+    """
+    CREATE INDEX idx_current_orders_active ON current_orders(order_num, site) WHERE active=1;
+    """,
+]
+
+# The archive database holds the orders moved out of ``orders.db`` by
+# :class:`Retention`, in tables shaped exactly like the hot ones. It has its
+# own ``user_version``; the same rules as for SCHEMA_MIGRATIONS apply.
+ARCHIVED_TABLES = ("events", "current_orders", "order_stations", "stage_durations")
+ARCHIVE_MIGRATIONS = [
+    # 1: the tables as of schema version 7 (archives from before migrations
+    # were tracked already have them)
+    """
+    CREATE TABLE IF NOT EXISTS archive.events (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT,
+        workstation TEXT,
+        timestamp TEXT,
+        UNIQUE(order_num, site, timestamp, workstation)
+    );
+    CREATE TABLE IF NOT EXISTS archive.current_orders (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        indigo TEXT,
+        laminate TEXT,
+        die_cutting_abg TEXT,
+        machine_glue TEXT,
+        shipping TEXT,
+        last_seen TEXT,
+        active INTEGER DEFAULT 1,
+        PRIMARY KEY (order_num, site)
+    );
+    CREATE TABLE IF NOT EXISTS archive.stage_durations (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        workstation TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        hours REAL,
+        PRIMARY KEY (order_num, site, timestamp, workstation)
+    ) WITHOUT ROWID;
+    """,
+    # 2: order_stations as in schema version 8
+    """
+    CREATE TABLE archive.order_stations (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        workstation TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        PRIMARY KEY (order_num, site, workstation)
+    ) WITHOUT ROWID;
+    INSERT INTO archive.order_stations(site, order_num, workstation, timestamp)
+    SELECT site, order_num, 'Indigo', indigo FROM archive.current_orders WHERE indigo IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Laminate', laminate FROM archive.current_orders
+    WHERE laminate IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Die Cutting ABG', die_cutting_abg FROM archive.current_orders
+    WHERE die_cutting_abg IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Machine Glue', machine_glue FROM archive.current_orders
+    WHERE machine_glue IS NOT NULL
+    UNION ALL
+    SELECT site, order_num, 'Shipping', shipping FROM archive.current_orders
+    WHERE shipping IS NOT NULL;
+
+    CREATE TABLE archive.current_orders_new (
+        site TEXT NOT NULL DEFAULT 'default',
+        order_num TEXT NOT NULL,
+        last_seen TEXT,
+        active INTEGER DEFAULT 1,
+        PRIMARY KEY (order_num, site)
+    );
+    INSERT INTO archive.current_orders_new(site, order_num, last_seen, active)
+    SELECT site, order_num, last_seen, active FROM archive.current_orders;
+    DROP TABLE archive.current_orders;
+    ALTER TABLE archive.current_orders_new RENAME TO current_orders;
+    """,
+]
 
-        # database setup
-        # allow using the connection from the background update thread
-        self.conn = sqlite3.connect(DB_FILE, check_same_thread=False)
-        c = self.conn.cursor()
-        c.execute(
+# site name of the single account configured by the top-level settings, and
+# of everything recorded before sites were tracked
+DEFAULT_SITE = "default"
+
+# Read queries issued by the GUI. tests/test_query_plans.py checks that none of
+# them needs a full table scan or a temporary sort.
+RECENT_EVENTS_SQL = (
+    "SELECT order_num, workstation, timestamp FROM events ORDER BY timestamp DESC LIMIT ?"
+)
+# an order number may exist at several sites; their histories are kept apart
+# and every row says which site it belongs to
+ORDER_DURATIONS_SQL = (
+    "SELECT site, workstation, timestamp, hours FROM stage_durations"
+    " WHERE order_num=? ORDER BY site, timestamp, workstation"
+)
+# Keyset pagination for the order views: one page after a given key, and
+# everything up to the last key already loaded. Current orders are keyed by
+# ``(order_num, site)``.
+ORDER_NUMS_PAGE_SQL = (
+    "SELECT DISTINCT order_num FROM events WHERE order_num > ? ORDER BY order_num LIMIT ?"
+)
+ORDER_NUMS_RANGE_SQL = (
+    "SELECT DISTINCT order_num FROM events WHERE order_num <= ? ORDER BY order_num"
+)
+# The completed stations of an order come along as one JSON object of
+# ``{workstation: timestamp}``, read off the order_stations primary key.
+_ORDER_STATIONS_JSON = """(
+        SELECT json_group_object(s.workstation, s.timestamp) FROM order_stations AS s
+        WHERE s.order_num = c.order_num AND s.site = c.site
+    )"""
+CURRENT_ORDERS_PAGE_SQL = f"""
+    SELECT order_num, site, {_ORDER_STATIONS_JSON}, last_seen, active
+    FROM current_orders AS c WHERE (order_num, site) > (?, ?) ORDER BY order_num, site LIMIT ?
+"""
+CURRENT_ORDERS_RANGE_SQL = f"""
+    SELECT order_num, site, {_ORDER_STATIONS_JSON}, last_seen, active
+    FROM current_orders AS c WHERE (order_num, site) <= (?, ?) ORDER BY order_num, site
+"""
+# single rows looked up again after they appear in ``order_changes``
+ORDER_NUM_SQL = "SELECT order_num FROM events WHERE order_num=? LIMIT 1"
+CURRENT_ORDER_SQL = f"""
+    SELECT order_num, site, {_ORDER_STATIONS_JSON}, last_seen, active
+    FROM current_orders AS c WHERE order_num=? AND site=?
+"""
+ORDER_CHANGES_SQL = (
+    "SELECT order_num, site FROM order_changes WHERE seq > ? AND seq <= ? ORDER BY seq"
+)
+
+def migrate(conn, migrations=SCHEMA_MIGRATIONS, schema="main"):
+    """Bring the schema of ``conn`` up to date and return the new version.
+
+    ``schema`` names the attached database ``migrations`` apply to.
+    """
+    version = conn.execute(f"PRAGMA {schema}.user_version").fetchone()[0]
+    for number, script in enumerate(migrations[version:], start=version + 1):
+        try:
+            conn.executescript(
+                f"BEGIN;\n{script}\nPRAGMA {schema}.user_version = {number};\nCOMMIT;"
+            )
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        logging.info("Migrated %s database to schema version %d", schema, number)
+        version = number
+    return version
+
+def connect_db(path=DB_FILE, readonly=False, archive=None, **kwargs):
+    """Open ``path`` with the tuned pragmas and an up-to-date schema.
+
+    ``readonly`` connections skip the migrations and cannot write; the database
+    must already exist. With ``archive`` the archive database at that path is
+    attached as well (see :func:`attach_archive`).
+    """
+    if readonly:
+        uri = Path(path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, **kwargs)
+    else:
+        conn = sqlite3.connect(path, **kwargs)
+        # only takes effect on a new database; --vacuum converts older ones
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA cache_size=-16000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if not readonly:
+        migrate(conn)
+    if archive:
+        attach_archive(conn, archive, readonly)
+    return conn
+
+def archive_path(db_file):
+    """Return the default archive database for ``db_file``."""
+    path = Path(db_file)
+    return str(path.with_name(f"{path.stem}-archive{path.suffix}"))
+
+def attach_archive(conn, path, readonly=False):
+    """Attach the archive database at ``path`` to ``conn`` as ``archive``.
+
+    Unless ``readonly`` the archive is created or migrated if needed. The
+    temporary views ``all_events``, ``all_current_orders``,
+    ``all_order_stations`` and ``all_stage_durations`` combine the hot and the
+    archived rows for :func:`_archived` queries.
+    """
+    if readonly:
+        # the read-only main connection was opened by URI, so this may be one too
+        conn.execute("ATTACH DATABASE ? AS archive", (Path(path).resolve().as_uri() + "?mode=ro",))
+    else:
+        conn.execute("ATTACH DATABASE ? AS archive", (path,))
+        conn.execute("PRAGMA archive.auto_vacuum=INCREMENTAL")
+        conn.execute("PRAGMA archive.journal_mode=WAL")
+        migrate(conn, ARCHIVE_MIGRATIONS, "archive")
+    for table in ARCHIVED_TABLES:
+        conn.execute(
+            f"CREATE TEMP VIEW IF NOT EXISTS all_{table} AS"
+            f" SELECT * FROM main.{table} UNION ALL SELECT * FROM archive.{table}"
+        )
+
+def _archived(sql):
+    """Return ``sql`` reading hot and archived rows through the ``all_*`` views."""
+    return re.sub(rf"\bFROM ({'|'.join(ARCHIVED_TABLES)})\b", r"FROM all_\1", sql)
+
+def archive_orders(conn, before, limit=500):
+    """Move up to ``limit`` orders inactive since before ``before`` to the archive.
+
+    ``before`` is an ISO timestamp compared with ``last_seen``. The events,
+    durations, stations and status of each order are copied into the
+    attached archive and deleted from the main database in one transaction.
+    A WAL database commits the two files separately, so the copy uses
+    ``INSERT OR IGNORE`` and a batch interrupted by a crash is simply moved
+    again. Returns the number of orders moved.
+    """
+    with conn:
+        cur = conn.cursor()
+        if not conn.in_transaction:
+            cur.execute("BEGIN")
+        cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS events (
-                order_num TEXT,
-                workstation TEXT,
-                timestamp TEXT,
-                UNIQUE(order_num, workstation, timestamp)
+            CREATE TEMP TABLE IF NOT EXISTS archive_batch(
+                order_num TEXT, site TEXT, PRIMARY KEY (order_num, site)
             )
             """
         )
-        c.execute(
+        cur.execute("DELETE FROM temp.archive_batch")
+        moved = cur.execute(
             """
-            CREATE TABLE IF NOT EXISTS current_orders (
-                order_num TEXT PRIMARY KEY,
-                indigo TEXT,
-                laminate TEXT,
-                die_cutting_abg TEXT,
-                machine_glue TEXT,
-                shipping TEXT,
-                last_seen TEXT,
-                active INTEGER DEFAULT 1
+            INSERT INTO temp.archive_batch
+            SELECT order_num, site FROM main.current_orders
+            WHERE active=0 AND last_seen < ? ORDER BY last_seen LIMIT ?
+            """,
+            (before, limit),
+        ).rowcount
+        if not moved:
+            return 0
+        batch = "(order_num, site) IN (SELECT order_num, site FROM temp.archive_batch)"
+        for table in ARCHIVED_TABLES:
+            cur.execute(
+                f"INSERT OR IGNORE INTO archive.{table} SELECT * FROM main.{table} WHERE {batch}"
             )
-            """
+            cur.execute(f"DELETE FROM main.{table} WHERE {batch}")
+    return moved
+
+def incremental_vacuum(conn, pages=1000):
+    """Give up to ``pages`` free pages of ``orders.db`` back to the file system.
+
+    Returns the number of free pages left, or ``None`` for a database
+    created before incremental vacuuming was enabled. Converting one takes a
+    full ``VACUUM`` that would hold up polling, so it is left to
+    :func:`enable_incremental_vacuum`.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        logging.info(
+            "The database does not use incremental vacuum, so freed space is kept;"
+            " run OrderTracker.py --vacuum once with the tracker stopped to enable it"
         )
-        self.conn.commit()
-
-        self.create_gui()
+        return None
+    conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+    return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def enable_incremental_vacuum(path=DB_FILE):
+    """Switch the database at ``path`` to incremental vacuum; see ``--vacuum``.
+
+    The whole file is rebuilt once, on a connection of its own. Returns
+    ``False`` if it already used incremental vacuum.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return False
+        logging.info("Rebuilding %s to enable incremental vacuum", path)
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        return True
+    finally:
+        conn.close()
+
+def latest_change(conn):
+    """Return the sequence number of the newest ``order_changes`` record."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='order_changes'").fetchone()
+    return row[0] if row else 0
+
+def changes_since(conn, seq):
+    """Return ``(latest, keys)`` for the orders changed after sequence ``seq``.
+
+    ``keys`` is the set of ``(order_num, site)`` inserted, updated or deleted
+    in ``current_orders`` since ``seq``; pass ``latest`` next time. ``keys``
+    is ``None`` if some of those changes were pruned already, in which case
+    the caller has to reload everything.
+    """
+    latest = latest_change(conn)
+    if seq >= latest:
+        return latest, set()
+    first = conn.execute("SELECT MIN(seq) FROM order_changes").fetchone()[0]
+    if first is None or first > seq + 1:
+        return latest, None
+    return latest, set(conn.execute(ORDER_CHANGES_SQL, (seq, latest)))
+
+def prune_changes(conn, keep=100000):
+    """Delete all but the newest ``keep`` change records; return how many went."""
+    with conn:
+        return conn.execute(
+            "DELETE FROM order_changes WHERE seq <= (SELECT MAX(seq) FROM order_changes) - ?",
+            (keep,),
+        ).rowcount
+
+EXPORT_FORMATS = ("csv", "jsonl")
+
+def _export_query(
+    order_pattern=None,
+    workstation=None,
+    start=None,
+    end=None,
+    site=None,
+    archived=False,
+    changed_since=None,
+):
+    """Build the query and parameters for :func:`export_events`."""
+    clauses = []
+    params = []
+    if changed_since is not None:
+        clauses.append(
+            "(order_num, site) IN (SELECT order_num, site FROM order_changes WHERE seq > ?)"
+        )
+        params.append(changed_since)
+    if site:
+        clauses.append("site = ?")
+        params.append(site)
+    if order_pattern:
+        clauses.append("order_num GLOB ?")
+        params.append(order_pattern)
+    if workstation:
+        clauses.append("workstation = ?")
+        params.append(workstation)
+    if start:
+        clauses.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        # a bare date includes that whole day
+        clauses.append("timestamp <= ?")
+        params.append(f"{end} 23:59:59" if len(end) == 10 else end)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = (
+        "SELECT order_num, workstation, timestamp, hours, site FROM stage_durations"
+        f" {where} ORDER BY order_num, site, timestamp, workstation"
+    )
+    return (_archived(sql) if archived else sql), params
+
+def export_events(conn, path, fmt=None, progress=None, batch_size=1000, **filters):
+    """Stream the events matching ``filters`` from ``conn`` into ``path``.
+
+    ``fmt`` is ``"csv"`` or ``"jsonl"`` and defaults to the file extension;
+    a trailing ``.gz`` compresses the output. ``filters`` are
+    ``order_pattern`` (a glob such as ``"10*"``), ``workstation``, ``start``
+    and ``end`` (ISO dates or timestamps) and ``site``; ``archived=True``
+    also exports archived orders, for which ``conn`` needs the archive
+    attached, and ``changed_since`` limits the export to orders changed after
+    that :func:`latest_change` sequence number. Rows are fetched and written
+    in batches of ``batch_size`` and ``progress(rows_written)`` is called
+    after each one. Returns the number of rows written.
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if fmt is None:
+        fmt = "jsonl" if name.endswith((".jsonl", ".json")) else "csv"
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    opener = gzip.open if path.endswith(".gz") else open
+
+    sql, params = _export_query(**filters)
+    cur = conn.execute(sql, params)
+    written = 0
+    with opener(path, "wt", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["Order", "Workstation", "Completed", "Time At Station (hours)", "Site"])
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            if fmt == "csv":
+                writer.writerows(
+                    (order_num, ws, ts, f"{hours:.2f}" if hours is not None else "", site)
+                    for order_num, ws, ts, hours, site in rows
+                )
+            else:
+                for order_num, ws, ts, hours, site in rows:
+                    record = {
+                        "order": order_num,
+                        "workstation": ws,
+                        "completed": ts,
+                        "hours": hours,
+                        "site": site,
+                    }
+                    f.write(json.dumps(record))
+                    f.write("\n")
+            written += len(rows)
+            if progress:
+                progress(written)
+    return written
+
+# Station analytics. Everything is aggregated in SQL so a year of history is
+# summarised without looping over orders in Python.
+THROUGHPUT_PERIODS = ("hour", "shift", "day")
+DWELL_PERCENTILES = (50, 90, 99)
+
+# the station an active order is waiting for: the one after the last of its
+# completed stations in process order (none once it passed them all). The
+# stations are bound as a JSON array, so their number and order can change;
+# counting per station instead of grouping the orders needs no sort.
+STATION_WIP_SQL = """
+    WITH stations(workstation, rank) AS (SELECT value, key FROM json_each(?1)),
+    progress(done) AS (
+        SELECT COALESCE(MAX(st.rank), -1) FROM current_orders AS c
+        LEFT JOIN order_stations AS s ON s.order_num = c.order_num AND s.site = c.site
+        LEFT JOIN stations AS st ON st.workstation = s.workstation
+        WHERE c.active = 1 GROUP BY c.order_num, c.site
+    )
+    SELECT value, (SELECT COUNT(*) FROM progress WHERE done = key - 1) FROM json_each(?1)
+"""
+STATION_COMPLETIONS_SQL = """
+    SELECT workstation, COUNT(*), COUNT(hours) FROM stage_durations
+    WHERE timestamp >= ? AND timestamp < ? GROUP BY workstation
+"""
+# the n-th shortest dwell time at a station, read straight off the index
+STATION_DWELL_SQL = """
+    SELECT hours FROM stage_durations
+    WHERE workstation = ? AND hours IS NOT NULL AND timestamp >= ? AND timestamp < ?
+    ORDER BY hours LIMIT 1 OFFSET ?
+"""
+
+GUI_QUERIES = {
+    "recent_events": (RECENT_EVENTS_SQL, (10,)),
+    "order_durations": (ORDER_DURATIONS_SQL, ("1001",)),
+    "order_nums_page": (ORDER_NUMS_PAGE_SQL, ("1001", 200)),
+    "order_nums_range": (ORDER_NUMS_RANGE_SQL, ("1001",)),
+    "current_orders_page": (CURRENT_ORDERS_PAGE_SQL, ("1001", "default", 200)),
+    "current_orders_range": (CURRENT_ORDERS_RANGE_SQL, ("1001", "default")),
+    "order_num": (ORDER_NUM_SQL, ("1001",)),
+    "current_order": (CURRENT_ORDER_SQL, ("1001", "default")),
+    "order_changes": (ORDER_CHANGES_SQL, (10, 20)),
+    "station_wip": (STATION_WIP_SQL, (json.dumps(WORKSTATIONS),)),
+    "station_completions": (STATION_COMPLETIONS_SQL, ("2023-09-01", "2023-09-08")),
+    "station_dwell": (STATION_DWELL_SQL, ("Indigo", "2023-09-01", "2023-09-08", 10)),
+}
+
+def _period_bucket(period, shift_start=6, shift_hours=8):
+    """Return the SQL expression and parameters grouping ``timestamp`` by ``period``."""
+    if period == "hour":
+        return "substr(timestamp, 1, 13)", []
+    if period == "day":
+        return "substr(timestamp, 1, 10)", []
+    if period == "shift":
+        # shifts start at ``shift_start`` o'clock; a night shift belongs to the
+        # day it started on
+        offset = f"-{shift_start} hours"
+        return (
+            "date(timestamp, ?) || ' #' ||"
+            " (CAST(strftime('%H', timestamp, ?) AS INTEGER) / ? + 1)",
+            [offset, offset, shift_hours],
+        )
+    raise ValueError(f"Unknown period: {period}")
+
+def _analytics_window(now=None, days=7):
+    """Return the ISO ``(start, end)`` of the ``days`` leading up to ``now``."""
+    end = now or datetime.now()
+    start = end - timedelta(days=days)
+    return start.isoformat(sep=" "), end.isoformat(sep=" ")
+
+def station_throughput(conn, period="hour", now=None, days=7, shift_start=6, shift_hours=8):
+    """Return ``(bucket, workstation, completions)`` rows for the last ``days``.
+
+    ``period`` is ``"hour"``, ``"shift"`` or ``"day"``; buckets without any
+    completions are left out.
+    """
+    bucket, params = _period_bucket(period, shift_start, shift_hours)
+    return conn.execute(
+        f"""
+        SELECT {bucket} AS bucket, workstation, COUNT(*) FROM events
+        WHERE timestamp >= ? AND timestamp < ?
+        GROUP BY bucket, workstation ORDER BY bucket, workstation
+        """,
+        [*params, *_analytics_window(now, days)],
+    ).fetchall()
+
+def station_report(
+    conn, now=None, days=7, shift_start=6, shift_hours=8, workstations=WORKSTATIONS
+):
+    """Summarise every workstation over the ``days`` leading up to ``now``.
+
+    Returns one dict per entry of ``workstations``, in process order, with
+    the current ``wip`` (active orders waiting for the station), the average
+    completions ``per_hour``, ``per_shift`` and ``per_day``, the dwell-time
+    percentiles ``p50``, ``p90`` and ``p99`` in hours (``None`` without data)
+    and ``queue_hours``, the time the current WIP takes to clear at that rate.
+    """
+    start, end = _analytics_window(now, days)
+    report = {
+        ws: {
+            "workstation": ws,
+            "wip": 0,
+            "completed": 0,
+            **{f"p{p}": None for p in DWELL_PERCENTILES},
+        }
+        for ws in workstations
+    }
+    for ws, count in conn.execute(STATION_WIP_SQL, (json.dumps(list(workstations)),)):
+        report[ws]["wip"] = count
+    for ws, completed, timed in conn.execute(STATION_COMPLETIONS_SQL, (start, end)):
+        if ws not in report:
+            continue
+        report[ws]["completed"] = completed
+        for p in DWELL_PERCENTILES:
+            if timed:
+                # nearest rank: the ceil(p% * n)-th smallest value
+                offset = (timed * p + 99) // 100 - 1
+                report[ws][f"p{p}"] = conn.execute(
+                    STATION_DWELL_SQL, (ws, start, end, offset)
+                ).fetchone()[0]
+
+    hours_in_window = days * 24
+    for row in report.values():
+        row["per_hour"] = row["completed"] / hours_in_window
+        row["per_shift"] = row["per_hour"] * shift_hours
+        row["per_day"] = row["per_hour"] * 24
+        row["queue_hours"] = row["wip"] / row["per_hour"] if row["per_hour"] else None
+    return list(report.values())
+
+def find_bottleneck(report):
+    """Return the workstation whose WIP takes longest to clear, if any."""
+    waiting = [row for row in report if row["wip"]]
+    if not waiting:
+        return None
+    return max(
+        waiting,
+        key=lambda row: float("inf") if row["queue_hours"] is None else row["queue_hours"],
+    )["workstation"]
+
+def format_station_report(report):
+    """Render ``station_report`` rows as a plain-text table."""
+
+    def num(value, spec=".1f"):
+        return "-" if value is None else format(value, spec)
+
+    lines = [
+        f"{'Workstation':<16}{'WIP':>6}{'/hour':>8}{'/shift':>8}{'/day':>8}"
+        f"{'p50 h':>8}{'p90 h':>8}{'p99 h':>8}{'queue h':>9}"
+    ]
+    for row in report:
+        lines.append(
+            f"{row['workstation']:<16}{row['wip']:>6}{num(row['per_hour'], '.2f'):>8}"
+            f"{num(row['per_shift']):>8}{num(row['per_day']):>8}{num(row['p50']):>8}"
+            f"{num(row['p90']):>8}{num(row['p99']):>8}{num(row['queue_hours']):>9}"
+        )
+    bottleneck = find_bottleneck(report)
+    lines.append(f"Bottleneck: {bottleneck or 'none'}")
+    return "\n".join(lines)
+
+class DBWorker:
+    """Run jobs one at a time on the thread that owns the write connection.
+
+    The rows of every update cycle and anything else that writes to
+    ``orders.db`` are submitted here, so only one thread ever writes. ``submit``
+    returns a ``concurrent.futures.Future`` for the job's result.
+    """
+
+    def __init__(self, path=DB_FILE, archive=None):
+        self.path = path
+        self.archive = archive
+        self.jobs = queue.Queue()
+        self.conn = None
+        self._error = None
+        ready = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, args=(ready,), name="db-worker", daemon=True
+        )
+        self.thread.start()
+        ready.wait()
+        if self._error is not None:
+            raise self._error
 
-        # Load current orders immediately if credentials are available.
-        if self.settings.get("username") and self.settings.get("password"):
+    def _run(self, ready):
+        try:
+            self.conn = connect_db(self.path, archive=self.archive)
+        except Exception as e:
+            self._error = e
+            return
+        finally:
+            ready.set()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
             try:
-                self.update_once()
+                future.set_result(fn(*args, **kwargs))
             except Exception as e:
-                logging.exception("Initial load failed: %s", e)
-    
-    def create_gui(self):
-        # container for all controls and logs on the left side
-        self.main_area = tk.Frame(self.root)
-        self.main_area.pack(side="left", fill="both", expand=True)
-
-        self.frame = tk.Frame(self.main_area)
-        self.frame.pack(padx=10, pady=10)
-
-        tk.Label(self.frame, text="YBS Username:").grid(row=0, column=0, sticky="e")
-        self.username = tk.Entry(self.frame)
-        self.username.grid(row=0, column=1)
-        self.username.insert(0, self.settings.get("username", ""))
-
-        tk.Label(self.frame, text="YBS Password:").grid(row=1, column=0, sticky="e")
-        self.password = tk.Entry(self.frame, show="*")
-        self.password.grid(row=1, column=1)
-        self.password.insert(0, self.settings.get("password", ""))
-
-        tk.Label(self.frame, text="Base URL:").grid(row=2, column=0, sticky="e")
-        self.base_url = tk.Entry(self.frame)
-        self.base_url.grid(row=2, column=1)
-        self.base_url.insert(0, self.settings.get("base_url", "https://www.ybsnow.com"))
-
-        self.save_btn = tk.Button(self.frame, text="Save Credentials", command=self.save_creds)
-        self.save_btn.grid(row=3, column=0, columnspan=2, pady=4)
-        self.test_btn = tk.Button(self.frame, text="Test Login", command=self.test_login)
-        self.test_btn.grid(row=4, column=0, columnspan=2, pady=4)
-        tk.Label(self.frame, text="Order Number:").grid(row=5, column=0, sticky="e")
-        self.order_entry = tk.Entry(self.frame)
-        self.order_entry.grid(row=5, column=1)
-        self.scrape_btn = tk.Button(self.frame, text="Scrape & Export Order", command=self.scrape_and_export)
-        self.scrape_btn.grid(row=6, column=0, columnspan=2, pady=8)
-
-        self.view_btn = tk.Button(self.frame, text="View Orders", command=self.show_orders_window)
-        self.view_btn.grid(row=7, column=0, columnspan=2, pady=4)
-
-        self.fetch_btn = tk.Button(self.frame, text="Fetch Orders Now", command=self.manual_fetch)
-        self.fetch_btn.grid(row=8, column=0, columnspan=2, pady=4)
-
-        self.table_btn = tk.Button(self.frame, text="Show Order Table", command=self.show_current_orders)
-        self.table_btn.grid(row=9, column=0, columnspan=2, pady=4)
-
-        # last record display
-        self.last_frame = tk.Frame(self.main_area)
-        self.last_frame.pack(fill="x", padx=10, pady=(0, 10))
-        tk.Label(self.last_frame, text="Order #:").grid(row=0, column=0, sticky="e")
-        self.last_order_entry = tk.Entry(self.last_frame, state="readonly", width=15)
-        self.last_order_entry.grid(row=0, column=1, padx=(0, 10))
-        tk.Label(self.last_frame, text="Workstation:").grid(row=0, column=2, sticky="e")
-        self.last_ws_entry = tk.Entry(self.last_frame, state="readonly", width=20)
-        self.last_ws_entry.grid(row=0, column=3, padx=(0, 10))
-        tk.Label(self.last_frame, text="Timestamp:").grid(row=0, column=4, sticky="e")
-        self.last_ts_entry = tk.Entry(self.last_frame, state="readonly", width=25)
-        self.last_ts_entry.grid(row=0, column=5)
-
-        # log of latest events
-        self.log_text = scrolledtext.ScrolledText(self.main_area, height=10)
-        self.log_text.pack(fill="both", expand=True, padx=10, pady=10)
-
-        # activity log to show program operations
-        self.activity_text = scrolledtext.ScrolledText(self.main_area, height=5, state="disabled")
-        self.activity_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+                logging.exception("Background job %s failed", getattr(fn, "__name__", fn))
+                future.set_exception(e)
+        self.conn.close()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.jobs.put((future, fn, args, kwargs))
+        return future
+
+    def stop(self):
+        """Finish the queued jobs, then close the connection."""
+        self.jobs.put(None)
+
+class SortedKeyView:
+    """Keep a sorted, keyed widget in step with query results by applying diffs.
+
+    The widget itself is driven through three callbacks so the same logic
+    serves both a ``Listbox`` and a ``Treeview``: ``insert(index, key, values)``,
+    ``update(key, values)`` and ``delete(index, key)``. Rows that did not
+    change are left alone, which keeps selection and scroll position intact.
+    """
+
+    def __init__(self, insert, update, delete):
+        self._insert = insert
+        self._update = update
+        self._delete = delete
+        self.keys = []
+        self.rows = {}
+
+    def index(self, key):
+        """Return the widget index of ``key`` or ``None`` if it is not shown."""
+        idx = bisect.bisect_left(self.keys, key)
+        if idx < len(self.keys) and self.keys[idx] == key:
+            return idx
+        return None
 
-        # status indicator
-        self.status_var = tk.StringVar(value="Idle")
-        self.status_label = tk.Label(self.main_area, textvariable=self.status_var, anchor="w")
-        self.status_label.pack(fill="x", padx=10, pady=(0, 10))
+    def merge(self, rows):
+        """Add or update ``rows`` without removing anything.
 
-        self.start_update_loop()
+        Returns the number of inserted and updated rows.
+        """
+        inserted = updated = 0
+        for key, values in rows:
+            if key not in self.rows:
+                idx = bisect.bisect_left(self.keys, key)
+                self.keys.insert(idx, key)
+                self._insert(idx, key, values)
+                inserted += 1
+            elif self.rows[key] != values:
+                self._update(key, values)
+                updated += 1
+            self.rows[key] = values
+        return inserted, updated
+
+    def apply(self, rows):
+        """Make the widget show ``rows`` (``(key, values)`` pairs).
+
+        Returns the number of inserted, updated and removed rows.
+        """
+        new = dict(rows)
+        removed = self.remove([key for key in self.rows if key not in new])
+        return (*self.merge(new.items()), removed)
+
+    def remove(self, keys):
+        """Remove those of ``keys`` that are shown; return how many were."""
+        removed = 0
+        for key in keys:
+            idx = self.index(key)
+            if idx is None:
+                continue
+            del self.keys[idx]
+            del self.rows[key]
+            self._delete(idx, key)
+            removed += 1
+        return removed
+
+class KeysetPager:
+    """Load a view in pages ordered by its key columns.
+
+    The key is the first column or columns of each row, as many as
+    ``range_sql`` has parameters (``order_num``, or ``order_num`` and
+    ``site``). ``page_sql`` takes ``(*after_key, limit)`` and ``range_sql``
+    takes ``last_key``. Each page is one indexed range scan, so the cost of
+    opening or scrolling a view does not depend on the size of the table.
+    """
+
+    def __init__(self, page_sql, range_sql, page_size=200):
+        self.page_sql = page_sql
+        self.range_sql = range_sql
+        self.page_size = page_size
+        self.key_size = range_sql.count("?")
+        self.last_key = ("",) * self.key_size
+        self.exhausted = False
+
+    def reset(self, page_sql=None, range_sql=None):
+        """Start again from the first page, optionally with other queries."""
+        self.page_sql = page_sql or self.page_sql
+        self.range_sql = range_sql or self.range_sql
+        self.last_key = ("",) * self.key_size
+        self.exhausted = False
+
+    def loaded(self, key):
+        """Return whether the row keyed ``key`` (a tuple) is on a loaded page."""
+        return self.exhausted or tuple(key) <= self.last_key
+
+    def next_page(self, conn):
+        """Return the next page of rows; an empty list once all are loaded."""
+        if self.exhausted:
+            return []
+        rows = conn.execute(self.page_sql, (*self.last_key, self.page_size)).fetchall()
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if rows:
+            self.last_key = tuple(rows[-1][: self.key_size])
+        return rows
+
+    def loaded_rows(self, conn):
+        """Re-read every row up to the last one loaded so far."""
+        if self.exhausted:
+            # LIMIT -1 means no limit, which also picks up orders added at the end
+            return conn.execute(self.page_sql, (*("",) * self.key_size, -1)).fetchall()
+        return conn.execute(self.range_sql, self.last_key).fetchall()
+
+class OrderIndex:
+    """Sorted in-memory index of order numbers for type-ahead search.
+
+    Prefix matches are found by bisection and the remaining substring matches
+    by ``str.find`` over all numbers joined into one string, so a search takes
+    a few milliseconds even with hundreds of thousands of orders. The index
+    follows ``order_changes`` through :meth:`update` instead of being rebuilt.
+    With ``archived`` it covers the archive database as well.
+    """
+
+    def __init__(self, archived=False):
+        self.archived = archived
+        self.keys = []
+        self.seq = None
+        # every number on its own line, searched for substrings
+        self._text = ""
+
+    @property
+    def loaded(self):
+        return self.seq is not None
+
+    def load(self, conn):
+        """Read every order number from ``conn``; returns the index."""
+        seq = latest_change(conn)
+        sql = "SELECT DISTINCT order_num FROM events ORDER BY order_num"
+        self.keys = [row[0] for row in conn.execute(_archived(sql) if self.archived else sql)]
+        self._reindex()
+        # set last: the GUI builds the index on another thread and checks ``loaded``
+        self.seq = seq
+        return self
+
+    def update(self, conn):
+        """Apply the changes logged since the last load; return how many keys changed."""
+        self.seq, changes = changes_since(conn, self.seq)
+        if changes is None:
+            count = len(self.keys)
+            self.load(conn)
+            return abs(len(self.keys) - count)
+        sql = _archived(ORDER_NUM_SQL) if self.archived else ORDER_NUM_SQL
+        changed = 0
+        for order_num in sorted({order_num for order_num, _ in changes}):
+            present = conn.execute(sql, (order_num,)).fetchone() is not None
+            idx = bisect.bisect_left(self.keys, order_num)
+            indexed = idx < len(self.keys) and self.keys[idx] == order_num
+            if present and not indexed:
+                self.keys.insert(idx, order_num)
+            elif indexed and not present:
+                del self.keys[idx]
+            else:
+                continue
+            changed += 1
+        if changed:
+            self._reindex()
+        return changed
+
+    def _reindex(self):
+        self._text = "\n".join(self.keys)
+
+    def search(self, text, limit=50):
+        """Return up to ``limit`` order numbers starting with, then containing, ``text``."""
+        text = text.strip()
+        if not text or "\n" in text:
+            return []
+        lo = bisect.bisect_left(self.keys, text)
+        hi = bisect.bisect_left(self.keys, text + "\U0010ffff", lo)
+        results = self.keys[lo : min(hi, lo + limit)]
+        pos = self._text.find(text)
+        while pos != -1 and len(results) < limit:
+            start = self._text.rfind("\n", 0, pos) + 1
+            end = self._text.find("\n", pos)
+            if end == -1:
+                end = len(self._text)
+            # numbers starting with ``text`` were found by the bisection
+            if pos != start:
+                results.append(self._text[start:end])
+            pos = self._text.find(text, end + 1)
+        return results
 
-        # open the manage page window after widgets are placed
-        self.root.after(100, self.show_manage_page)
+class PollScheduler:
+    """Run update cycles one at a time on an adaptive interval.
+
+    ``cycle(manual)`` is called from the scheduler thread and returns
+    ``"changed"``, ``"unchanged"`` or ``"failed"``. Failures back off
+    exponentially with jitter up to ``max_backoff`` seconds. After
+    ``idle_after`` unchanged pages in a row the interval doubles with each
+    further unchanged page, up to ``max_interval``. :meth:`trigger` starts a
+    cycle straight away, or is merged into the one already running.
+    """
+
+    def __init__(
+        self,
+        cycle,
+        interval=60,
+        max_interval=600,
+        idle_after=5,
+        max_backoff=900,
+        rand=random.random,
+    ):
+        self.cycle = cycle
+        self.interval = interval
+        self.max_interval = max_interval
+        self.idle_after = idle_after
+        self.max_backoff = max_backoff
+        self.random = rand
+        self.failures = 0
+        self.unchanged = 0
+        self.running = False
+        self.manual = False
+        self.thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def next_delay(self):
+        """Seconds to wait before the next cycle, given the outcomes so far."""
+        if self.failures:
+            delay = min(self.max_backoff, self.interval * 2 ** self.failures)
+            return delay * (0.5 + self.random() / 2)
+        if self.unchanged >= self.idle_after:
+            steps = self.unchanged - self.idle_after + 1
+            return min(self.max_interval, self.interval * 2 ** steps)
+        return self.interval
+
+    def record(self, outcome):
+        if outcome == "failed":
+            self.failures += 1
+            self.unchanged = 0
+        else:
+            self.failures = 0
+            self.unchanged = self.unchanged + 1 if outcome == "unchanged" else 0
+
+    def step(self):
+        """Run one cycle now and return the delay before the next one."""
+        with self._lock:
+            self.running = True
+            manual, self.manual = self.manual, False
+            self._wake.clear()
+        try:
+            outcome = self.cycle(manual)
+        except Exception:
+            logging.exception("Update cycle failed")
+            outcome = "failed"
+        finally:
+            with self._lock:
+                self.running = False
+        self.record(outcome)
+        return self.next_delay()
+
+    def trigger(self):
+        """Run a cycle as soon as possible.
+
+        Returns ``False`` if a cycle is already running; its result is used
+        instead of starting another one.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            self.manual = True
+            self._wake.set()
+            return True
+
+    def start(self, delay=0):
+        self.thread = threading.Thread(
+            target=self._run, args=(delay,), name="poll-scheduler", daemon=True
+        )
+        self.thread.start()
 
-    def show_manage_page(self):
-        """Display manage.html in a frame on the right side of the GUI."""
-        if getattr(self, "manage_frame", None):
-            return
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
 
-        self.manage_frame = tk.Frame(self.root, width=600)
-        self.manage_frame.pack(side="right", fill="y", padx=(0, 10), pady=10)
+    def _run(self, delay):
+        while True:
+            self._wake.wait(delay)
+            if self._stop.is_set():
+                break
+            delay = self.step()
+
+class Retention:
+    """Move orders inactive for more than ``max_age`` days into the archive.
+
+    Every ``interval`` seconds the due orders are moved ``batch_size`` at a
+    time by :func:`archive_orders`, each batch a separate job on the database
+    worker, so an update cycle waits for one short batch at most. The freed
+    pages are then returned to the file system ``vacuum_pages`` at a time.
+    A ``max_age`` of 0 disables archiving. Either way ``order_changes`` is
+    trimmed to its newest ``keep_changes`` records.
+    """
+
+    def __init__(
+        self,
+        worker,
+        max_age=90,
+        batch_size=500,
+        interval=3600,
+        vacuum_pages=1000,
+        keep_changes=100000,
+    ):
+        self.worker = worker
+        self.max_age = max_age
+        self.batch_size = batch_size
+        self.interval = interval
+        self.vacuum_pages = vacuum_pages
+        self.keep_changes = keep_changes
+        self.thread = None
+        self._stop = threading.Event()
+
+    def run_once(self, now=None):
+        """Archive every due order now and return how many were moved."""
+        self.worker.submit(prune_changes, self.worker.conn, self.keep_changes).result()
+        if not self.max_age:
+            return 0
+        now = now or datetime.now()
+        before = (now - timedelta(days=self.max_age)).isoformat(sep=" ")
+        moved = 0
+        while not self._stop.is_set():
+            batch = self.worker.submit(
+                archive_orders, self.worker.conn, before, self.batch_size
+            ).result()
+            moved += batch
+            if batch < self.batch_size:
+                break
+        if moved:
+            logging.info("Archived %d orders inactive since before %s", moved, before[:10])
+            while not self._stop.is_set() and self.worker.submit(
+                incremental_vacuum, self.worker.conn, self.vacuum_pages
+            ).result():
+                pass
+        return moved
 
-        frame = HtmlFrame(
-            self.manage_frame,
-            vertical_scrollbar=True,
-            horizontal_scrollbar=True,
-            zoom=0.8,
+    def start(self, delay=60):
+        self.thread = threading.Thread(
+            target=self._run, args=(delay,), name="retention", daemon=True
         )
-        frame.pack(fill="both", expand=True)
-        self.manage_html_frame = frame
-        self.reload_manage_page()
+        self.thread.start()
 
-    def reload_manage_page(self, session=None):
-        """Load ``manage.html`` into the embedded browser using an authenticated session."""
-        if not getattr(self, "manage_html_frame", None):
-            return
-        if session is None:
-            session = requests.Session()
-            if not self.do_login(session):
-                base = self.settings.get("base_url", "https://www.ybsnow.com").rstrip("/")
-                self.manage_html_frame.load_website(f"{base}/manage.html")
-                return
+    def stop(self):
+        self._stop.set()
 
-        base = self.settings.get("base_url", "https://www.ybsnow.com").rstrip("/")
+    def _run(self, delay):
+        while not self._stop.wait(delay):
+            try:
+                self.run_once()
+            except Exception:
+                logging.exception("Archiving old orders failed")
+            delay = self.interval
+
+class Histogram:
+    """Running count and sum of a phase's durations plus its latest samples.
+
+    Quantiles are taken over the last ``window`` samples only, so they follow
+    recent behaviour while ``count`` and ``total`` keep growing.
+    """
+
+    def __init__(self, window=500):
+        self.samples = collections.deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    @property
+    def last(self):
+        return self.samples[-1] if self.samples else None
+
+    def quantile(self, q):
+        """Return the nearest-rank ``q`` quantile of the recent samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class Metrics:
+    """Phase timings and counters for the update cycle and the GUI.
+
+    Phases are timed with :meth:`timer` or the :meth:`timed` decorator and
+    kept in a :class:`Histogram` each; counters are bumped with :meth:`inc`.
+    :meth:`write` saves a snapshot as Prometheus text or, for a ``.json``
+    path, as JSON.
+    """
+
+    COUNTERS = ("cycles", "failures", "relogins", "rows_parsed", "events_inserted")
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self, window=500):
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.phases = {}
+            self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            hist = self.phases.get(phase)
+            if hist is None:
+                hist = self.phases[phase] = Histogram(self.window)
+            hist.observe(seconds)
+
+    def inc(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    @contextlib.contextmanager
+    def timer(self, phase):
+        started = time.perf_counter()
         try:
-            resp = session.get(f"{base}/manage.html", timeout=10)
-        except TypeError:
-            resp = session.get(f"{base}/manage.html")
-        except Exception:
-            self.manage_html_frame.load_website(f"{base}/manage.html")
-            return
-        self.manage_html_frame.load_html(resp.text, f"{base}/manage.html")
-
-    def save_creds(self):
-        self.settings["username"] = self.username.get()
-        self.settings["password"] = self.password.get()
-        self.settings["base_url"] = self.base_url.get()
-        save_settings(self.settings)
-        messagebox.showinfo("Saved", "Credentials saved.")
-
-    def test_login(self):
-        session = requests.Session()
-        username = self.username.get()
-        password = self.password.get()
-        base_url = self.base_url.get()
-        if self.do_login(session, username=username, password=password, base_url=base_url):
-            messagebox.showinfo("Login Test", "Login successful!")
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started)
+
+    def timed(self, phase):
+        """Decorator recording every call of the wrapped function as ``phase``."""
+
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(phase):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def summary(self):
+        """One line for the status bar: the last cycle and its slowest phases."""
+        with self._lock:
+            last = {phase: hist.last for phase, hist in self.phases.items()}
+            counters = dict(self.counters)
+        parts = []
+        if last.get("cycle") is not None:
+            phases = sorted(
+                (
+                    (seconds, phase)
+                    for phase, seconds in last.items()
+                    if phase in ("login", "fetch", "parse", "parse_datetime", "db_write")
+                ),
+                reverse=True,
+            )
+            detail = ", ".join(f"{phase} {seconds * 1000:.0f}" for seconds, phase in phases[:3])
+            parts.append(f"cycle {last['cycle'] * 1000:.0f} ms ({detail})")
+        parts.append(f"{counters['cycles']} cycles, {counters['failures']} failed")
+        return " | ".join(parts)
+
+    def snapshot(self):
+        """Return counters and per-phase statistics as plain data."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "phases": {
+                    phase: {
+                        "count": hist.count,
+                        "sum": hist.total,
+                        **{f"p{round(q * 100)}": hist.quantile(q) for q in self.QUANTILES},
+                    }
+                    for phase, hist in sorted(self.phases.items())
+                },
+            }
+
+    def prometheus(self):
+        """Render :meth:`snapshot` in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines = []
+        for name, value in snap["counters"].items():
+            lines.append(f"# TYPE ybs_{name}_total counter")
+            lines.append(f"ybs_{name}_total {value}")
+        lines.append("# TYPE ybs_phase_seconds summary")
+        for phase, stats in snap["phases"].items():
+            for q in self.QUANTILES:
+                value = stats[f"p{round(q * 100)}"]
+                lines.append(f'ybs_phase_seconds{{phase="{phase}",quantile="{q}"}} {value}')
+            lines.append(f'ybs_phase_seconds_sum{{phase="{phase}"}} {stats["sum"]}')
+            lines.append(f'ybs_phase_seconds_count{{phase="{phase}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically replace ``path`` with the current metrics."""
+        if path.endswith(".json"):
+            text = json.dumps(self.snapshot(), indent=1)
         else:
-            messagebox.showerror("Login Test", "Login failed.")
+            text = self.prometheus()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+
+# shared by the service and the GUI so every phase lands in one place
+metrics = Metrics()
+
+class SessionManager:
+    """Keep one authenticated ``requests.Session`` alive across update cycles.
+
+    Cookies and pooled connections are reused between polls. ``login`` is only
+    called again after :meth:`invalidate` (for example when ``update_orders``
+    finds itself redirected to the login page) or :meth:`reset`.
+    """
+
+    def __init__(self, login):
+        self._login = login
+        self._lock = threading.RLock()
+        self.session = None
+        self.logged_in = False
+
+    def get(self):
+        """Return a logged in session, or ``None`` if logging in failed."""
+        with self._lock:
+            if self.session is None:
+                self.session = requests.Session()
+            if not self.logged_in:
+                self.logged_in = bool(self._login(self.session))
+            return self.session if self.logged_in else None
+
+    def adopt(self, session):
+        """Use ``session``, already logged in, for the following cycles."""
+        with self._lock:
+            self.session = session
+            self.logged_in = True
+
+    def invalidate(self):
+        """Force the next :meth:`get` to log in again."""
+        with self._lock:
+            self.logged_in = False
+
+    def reset(self):
+        """Drop the session, e.g. after the saved credentials changed.
+
+        The old session is not closed: a cycle still running may be using it.
+        """
+        with self._lock:
+            self.session = None
+            self.logged_in = False
+
+class ManagePageCache:
+    """Remember the last ``manage.html`` we processed to detect unchanged polls.
+
+    Conditional request headers are sent when the server supplied an ``ETag``
+    or ``Last-Modified`` header; otherwise a hash of the body is compared. The
+    body itself is kept so the embedded browser can show it without another
+    download.
+    """
+
+    def __init__(self):
+        self.etag = None
+        self.last_modified = None
+        self.digest = None
+        self.text = None
+        self.url = None
+        # outcome of the last poll: "changed", "unchanged" or "failed"
+        self.status = "changed"
+        self.skipped = 0
+
+    @property
+    def changed(self):
+        return self.status == "changed"
+
+    def request_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @staticmethod
+    def _digest(resp):
+        return hashlib.sha1(resp.text.encode("utf-8")).hexdigest()
+
+    def is_unchanged(self, resp):
+        """Return ``True`` if ``resp`` holds the page we processed last time."""
+        unchanged = getattr(resp, "status_code", 200) == 304 or (
+            self.digest is not None and self._digest(resp) == self.digest
+        )
+        self.status = "unchanged" if unchanged else "changed"
+        if unchanged:
+            self.skipped += 1
+        return unchanged
+
+    def store(self, resp, url):
+        """Record ``resp`` once its contents have been written to the database."""
+        headers = getattr(resp, "headers", None) or {}
+        self.etag = headers.get("ETag")
+        self.last_modified = headers.get("Last-Modified")
+        self.digest = self._digest(resp)
+        self.text = resp.text
+        self.url = url
+
+def site_profiles(settings):
+    """Return the site profiles listed under ``sites`` in ``settings``.
+
+    Each profile is a dict with a unique ``name`` and any of ``username``,
+    ``password`` and ``base_url``; keys it leaves out come from the top level
+    of ``settings``. Without a ``sites`` list the top-level details form a
+    single site called ``default``.
+
+    The name keys every row a site stores, so a missing or repeated name
+    would merge two sites; ``ValueError`` says which profiles are wrong.
+    """
+    profiles = settings.get("sites") or [{"name": DEFAULT_SITE}]
+    problems = []
+    seen = set()
+    for number, profile in enumerate(profiles, start=1):
+        name = profile.get("name")
+        if not name or not str(name).strip():
+            problems.append(f"site {number} has no name")
+        elif name in seen:
+            problems.append(f"the name {name!r} is used by more than one site")
+        seen.add(name)
+    if problems:
+        raise ValueError(f"Invalid sites in {SETTINGS_FILE}: " + "; ".join(problems))
+    return profiles
+
+class Site:
+    """One YBS site or account scraped by the tracker.
+
+    Every site keeps its own persistent session and ``manage.html`` cache so
+    sites can be polled side by side without sharing cookies.
+    """
+
+    def __init__(self, profile, settings, login):
+        self.name = profile["name"]
+        self.settings = collections.ChainMap(profile, settings)
+        self._login = login
+        self.sessions = SessionManager(self.login)
+        self.page_cache = ManagePageCache()
+
+    def login(self, session, **kwargs):
+        """Log in with this site's details unless ``kwargs`` override them."""
+        details = {
+            key: self.settings[key]
+            for key in ("username", "password", "base_url")
+            if key in self.settings
+        }
+        details.update((key, value) for key, value in kwargs.items() if value is not None)
+        return self._login(session, **details)
+
+class TrackerService:
+    """Login, scrape and store orders without any GUI.
+
+    This is the whole pipeline behind the tracker: a persistent session, the
+    ``manage.html`` change detection, the database worker and the poll
+    scheduler. ``YBSScraperApp`` builds the Tk interface on top of it and
+    ``--headless`` runs it on its own.
+    """
+
+    def __init__(self, settings=None, db_file=None):
+        if db_file is None:
+            db_file = DB_FILE
+        self.db_file = db_file
+        self.settings = load_settings() if settings is None else settings
+        self.archive_file = self.settings.get("archive_file") or archive_path(db_file)
+        self.sites = [
+            Site(profile, self.settings, self.do_login) for profile in site_profiles(self.settings)
+        ]
+        # the first site is the one shown in the GUI and edited by its login form
+        self.sessions = self.sites[0].sessions
+        self.page_cache = self.sites[0].page_cache
+        self.new_events = 0
+        # sites are fetched and parsed side by side; their rows still go
+        # through the single database worker
+        self.pool = ThreadPoolExecutor(
+            max_workers=min(len(self.sites), self.settings.get("max_site_workers", 4)),
+            thread_name_prefix="site",
+        )
+        self._cycle_lock = threading.Lock()
+
+        # database setup: the worker thread owns the only write connection and
+        # readers use their own read-only one
+        self.worker = DBWorker(db_file, archive=self.archive_file)
+        self.conn = self.worker.conn
+        self.read_conn = connect_db(db_file, readonly=True, archive=self.archive_file)
+        # orders inactive for longer than archive_after_days move to the archive
+        self.retention = Retention(
+            self.worker,
+            max_age=self.settings.get("archive_after_days", 90),
+            batch_size=self.settings.get("archive_batch_size", 500),
+            interval=self.settings.get("archive_interval", 3600),
+            keep_changes=self.settings.get("change_log_size", 100000),
+        )
+
+        self.scheduler = PollScheduler(
+            self.run_cycle,
+            interval=self.settings.get("poll_interval", 60),
+            max_interval=self.settings.get("max_poll_interval", 600),
+        )
 
+    @metrics.timed("login")
     def do_login(self, session, username=None, password=None, base_url=None):
         """Login to the YBS website using details from the live login form."""
         if username is None:
@@ -233,7 +1870,7 @@ class YBSScraperApp:
                 form = f
                 break
         if not form:
-            print("Login form not found on page")
+            logging.warning("Login form not found on %s", base)
             return False
 
         action = form.get("action", "/login.html")
@@ -285,133 +1922,631 @@ class YBSScraperApp:
                     return False
                 if manage.status_code == 200 and "login" not in manage.url.lower():
                     logged_in = True
-        print(
-            f"Login POST to {login_url} returned {response.status_code}, logged_in={logged_in}, url={response.url}"
+        logging.log(
+            logging.DEBUG if logged_in else logging.WARNING,
+            "Login POST to %s returned %s, logged_in=%s, url=%s",
+            login_url,
+            response.status_code,
+            logged_in,
+            response.url,
+        )
+        return logged_in
+
+    def parse_datetime(self, text):
+        """Parse timestamps using several known formats.
+
+        Returns a ``datetime`` object or ``None`` if ``text`` does not match any
+        supported format. Empty cells return ``None`` quietly; other unknown
+        strings are logged using ``logging.warning``.
+        """
+        if not text:
+            return None
+        dt = _parse_datetime(text)
+        if dt is None:
+            logging.warning("Unrecognized datetime format: %s", text)
+        return dt
+
+    def update_orders(self, session, site=None):
+        """Fetch ``manage.html`` of ``site`` and store it; return the new events.
+
+        ``site`` defaults to the first configured site, the one the GUI shows.
+        """
+        if site is None:
+            site = self.sites[0]
+        cache = site.page_cache
+        base = site.settings.get("base_url", "https://www.ybsnow.com").rstrip("/")
+        url = f"{base}/manage.html"
+        headers = cache.request_headers()
+        try:
+            with metrics.timer("fetch"):
+                try:
+                    resp = session.get(url, headers=headers, timeout=10)
+                except TypeError:
+                    resp = session.get(url)
+        except requests.exceptions.RequestException as e:
+            logging.error("Failed to update orders: %s", e)
+            cache.status = "failed"
+            return 0
+
+        resp_url = getattr(resp, "url", url)
+        if "login" in resp_url.lower() or "type=\"password\"" in resp.text.lower():
+            # the persistent session expired; this is the only place we log in again
+            metrics.inc("relogins")
+            if not site.login(session):
+                logging.error("Re-login failed while updating orders")
+                site.sessions.invalidate()
+                cache.status = "failed"
+                return 0
+            try:
+                with metrics.timer("fetch"):
+                    try:
+                        resp = session.get(url, headers=headers, timeout=10)
+                    except TypeError:
+                        resp = session.get(url)
+            except requests.exceptions.RequestException as e:
+                logging.error("Failed to update orders after re-login: %s", e)
+                cache.status = "failed"
+                return 0
+
+        status = getattr(resp, "status_code", 200)
+        if status >= 400:
+            # an error page has no order rows; parsing it would deactivate every order
+            logging.error("manage.html returned HTTP %s", status)
+            cache.status = "failed"
+            return 0
+
+        if cache.is_unchanged(resp):
+            return 0
+
+        event_rows, order_rows = self.parse_orders(resp.text)
+        inserted = self._write(event_rows, order_rows, site.name)
+        metrics.inc("rows_parsed", len(order_rows))
+        metrics.inc("events_inserted", inserted)
+        cache.store(resp, url)
+        return inserted
+
+    @property
+    def workstations(self):
+        """The stations read from ``manage.html`` in process order.
+
+        They default to ``WORKSTATIONS`` and can be changed with the
+        ``workstations`` setting; the table header says where each one is.
+        """
+        return configured_workstations(self.settings)
+
+    def parse_orders(self, html):
+        """Return the ``events`` and ``current_orders`` rows described by ``html``.
+
+        Event rows are ``(order_num, workstation, timestamp)`` for every
+        completed station on the page, which is also the current state of
+        ``order_stations``; order rows are ``(order_num, last_seen)``.
+        """
+        event_rows = []
+        order_rows = []
+        now_iso = datetime.now().isoformat(sep=" ")
+        workstations = self.workstations
+
+        # extract first so the table parsing and the timestamps are timed apart
+        with metrics.timer("parse"):
+            rows = list(extract_rows(html, self.settings.get("row_parser"), workstations))
+        with metrics.timer("parse_datetime"):
+            for order_num, timestamps in rows:
+                for ws, ts in zip(workstations, timestamps):
+                    dt = self.parse_datetime(ts)
+                    if dt:
+                        event_rows.append((order_num, ws, dt.isoformat(sep=" ")))
+                order_rows.append((order_num, now_iso))
+        return event_rows, order_rows
+
+    def _write(self, event_rows, order_rows, site=DEFAULT_SITE):
+        """Run :meth:`write_orders` on the database worker and wait for it."""
+        if threading.current_thread() is self.worker.thread:
+            return self.write_orders(event_rows, order_rows, site)
+        return self.worker.submit(self.write_orders, event_rows, order_rows, site).result()
+
+    @metrics.timed("db_write")
+    def write_orders(self, event_rows, order_rows, site=DEFAULT_SITE):
+        """Store one page worth of rows for ``site`` and return the new events.
+
+        Everything is written in a single transaction. Orders of ``site``
+        missing from ``order_rows`` are marked inactive with one set-based
+        statement; other sites are left alone. Of the stations only those
+        that are new, moved or gone are written.
+        """
+        started = time.perf_counter()
+        with self.conn:
+            cur = self.conn.cursor()
+            if not self.conn.in_transaction:
+                cur.execute("BEGIN")
+            inserted = self._insert_events(cur, [(site, *row) for row in event_rows])
+
+            cur.executemany(
+                """
+                INSERT INTO current_orders(site, order_num, last_seen, active)
+                VALUES(?, ?, ?, 1)
+                ON CONFLICT(order_num, site) DO UPDATE SET
+                    last_seen=excluded.last_seen,
+                    active=1
+                """,
+                ((site, *row) for row in order_rows),
+            )
+            cur.execute("CREATE TEMP TABLE IF NOT EXISTS seen_orders(order_num TEXT PRIMARY KEY)")
+            cur.execute("DELETE FROM temp.seen_orders")
+            cur.executemany(
+                "INSERT OR IGNORE INTO temp.seen_orders(order_num) VALUES(?)",
+                ((row[0],) for row in order_rows),
+            )
+            self._write_stations(cur, site)
+
+            # mark orders that disappeared
+            cur.execute(
+                """
+                UPDATE current_orders SET active=0
+                WHERE site=? AND active=1
+                  AND order_num NOT IN (SELECT order_num FROM temp.seen_orders)
+                """,
+                (site,),
+            )
+        logging.debug(
+            "Wrote %d orders of %s (%d new events) in %.1f ms",
+            len(order_rows),
+            site,
+            inserted,
+            (time.perf_counter() - started) * 1000,
+        )
+        return inserted
+
+    def _write_stations(self, cur, site):
+        """Bring ``order_stations`` of the orders in ``temp.seen_orders`` in line.
+
+        The page's completed stations are the event rows :meth:`_insert_events`
+        left in ``temp.cycle_events``. Stations whose timestamp did not change
+        are left untouched, so an unchanged page writes nothing here.
+        """
+        cur.execute(
+            """
+            INSERT INTO order_stations(site, order_num, workstation, timestamp)
+            SELECT site, order_num, workstation, timestamp FROM temp.cycle_events WHERE true
+            ON CONFLICT(order_num, site, workstation) DO UPDATE SET timestamp=excluded.timestamp
+            WHERE timestamp IS NOT excluded.timestamp
+            """
+        )
+        # a station the page no longer shows as completed
+        cur.execute(
+            """
+            DELETE FROM order_stations
+            WHERE site=? AND order_num IN (SELECT order_num FROM temp.seen_orders)
+              AND (order_num, workstation) NOT IN (
+                  SELECT order_num, workstation FROM temp.cycle_events
+              )
+            """,
+            (site,),
+        )
+
+    def _insert_events(self, cur, event_rows):
+        """Insert new events and update ``stage_durations``; return the count.
+
+        ``event_rows`` are ``(site, order_num, workstation, timestamp)``. Only
+        the intervals touching a new event are recomputed: the new rows
+        themselves and the row just before the earliest new one of each order.
+        """
+        cur.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS cycle_events(site TEXT, order_num TEXT, workstation TEXT, timestamp TEXT)"
+        )
+        cur.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS new_events(site TEXT, order_num TEXT, workstation TEXT, timestamp TEXT)"
+        )
+        cur.execute("DELETE FROM temp.cycle_events")
+        cur.execute("DELETE FROM temp.new_events")
+        cur.executemany("INSERT INTO temp.cycle_events VALUES(?, ?, ?, ?)", event_rows)
+        cur.execute(
+            """
+            INSERT INTO temp.new_events
+            SELECT DISTINCT site, order_num, workstation, timestamp FROM temp.cycle_events AS c
+            WHERE NOT EXISTS (
+                SELECT 1 FROM events AS e
+                WHERE e.order_num = c.order_num AND e.site = c.site
+                  AND e.timestamp = c.timestamp AND e.workstation = c.workstation
+            )
+            """
+        )
+        inserted = cur.execute(
+            """
+            INSERT INTO events(site, order_num, workstation, timestamp)
+            SELECT site, order_num, workstation, timestamp FROM temp.new_events
+            """
+        ).rowcount
+        if not inserted:
+            return 0
+        cur.execute(
+            """
+            INSERT OR IGNORE INTO stage_durations(site, order_num, workstation, timestamp)
+            SELECT site, order_num, workstation, timestamp FROM temp.new_events
+            """
+        )
+        # earliest new timestamp of every order that got new events
+        cur.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS new_orders(
+                order_num TEXT, site TEXT, since TEXT, PRIMARY KEY (order_num, site)
+            )
+            """
+        )
+        cur.execute("DELETE FROM temp.new_orders")
+        cur.execute(
+            """
+            INSERT INTO temp.new_orders
+            SELECT order_num, site, MIN(timestamp) FROM temp.new_events GROUP BY order_num, site
+            """
+        )
+        cur.execute(
+            """
+            UPDATE stage_durations SET hours = (
+                SELECT (strftime('%s', n.timestamp) - strftime('%s', stage_durations.timestamp)) / 3600.0
+                FROM stage_durations AS n
+                WHERE n.order_num = stage_durations.order_num AND n.site = stage_durations.site
+                  AND (n.timestamp, n.workstation) > (stage_durations.timestamp, stage_durations.workstation)
+                ORDER BY n.timestamp, n.workstation LIMIT 1
+            )
+            WHERE (order_num, site) IN (SELECT order_num, site FROM temp.new_orders)
+              AND timestamp >= COALESCE(
+                  (
+                      SELECT MAX(p.timestamp) FROM stage_durations AS p
+                      WHERE p.order_num = stage_durations.order_num AND p.site = stage_durations.site
+                        AND p.timestamp < (
+                            SELECT since FROM temp.new_orders AS o
+                            WHERE o.order_num = stage_durations.order_num
+                              AND o.site = stage_durations.site
+                        )
+                  ),
+                  ''
+              )
+            """
+        )
+        return inserted
+
+    def get_order_data(self, order_num, archived=False):
+        """Return ``(site, workstation, completed, hours)`` rows for ``order_num``.
+
+        The same order number can exist at several sites; the rows come
+        grouped by site. ``hours`` is read from ``stage_durations`` and is
+        ``None`` for the most recent stage. With ``archived`` the archive
+        database is searched too.
+        """
+        sql = _archived(ORDER_DURATIONS_SQL) if archived else ORDER_DURATIONS_SQL
+        cur = self.read_conn.cursor()
+        return [
+            (site, ws, datetime.fromisoformat(ts).strftime("%m/%d/%y %H:%M"), hours)
+            for site, ws, ts, hours in cur.execute(sql, (order_num,))
+        ]
+
+    def station_analytics(self, conn, days=7, period="day"):
+        """Return the station report and throughput for the last ``days``.
+
+        ``conn`` is passed in so the GUI can run this on its own thread; shift
+        boundaries come from ``shift_start`` and ``shift_hours`` in the settings.
+        """
+        shifts = {
+            "shift_start": self.settings.get("shift_start", 6),
+            "shift_hours": self.settings.get("shift_hours", 8),
+        }
+        report = station_report(conn, days=days, workstations=self.workstations, **shifts)
+        throughput = station_throughput(conn, period, days=days, **shifts)
+        return report, throughput
+
+    def run_cycle(self, manual=False):
+        """Run one update cycle and return its outcome; used by the scheduler."""
+        return self.update_once(silent=not manual)
+
+    def update_once(self, silent=False):
+        """Fetch the manage page of every site and update order data.
+
+        Sites are fetched and parsed concurrently on ``self.pool`` while their
+        rows are written one after another by the database worker, so a cycle
+        takes about as long as the slowest site. Returns ``"changed"`` if any
+        site changed, ``"failed"`` if all of them failed and ``"unchanged"``
+        otherwise; the number of new events is left in ``self.new_events``.
+        """
+        with self._cycle_lock, metrics.timer("cycle"):
+            if len(self.sites) == 1:
+                results = [self._update_site(self.sites[0])]
+            else:
+                results = list(self.pool.map(self._update_site, self.sites))
+        statuses = {status for status, _ in results}
+        self.new_events = sum(inserted for _, inserted in results)
+        if "changed" in statuses:
+            outcome = "changed"
+        elif statuses == {"failed"}:
+            outcome = "failed"
+        else:
+            outcome = "unchanged"
+        metrics.inc("cycles")
+        if outcome == "failed":
+            metrics.inc("failures")
+        elif outcome == "changed":
+            logging.info("Update complete (%d new events)", self.new_events)
+        else:
+            logging.info(
+                "No changes on manage.html (%d unchanged polls skipped)",
+                sum(site.page_cache.skipped for site in self.sites),
+            )
+        self.write_metrics()
+        return outcome
+
+    def _update_site(self, site):
+        """Update one site; return its ``(status, new_events)``.
+
+        Errors are logged and count as a failed poll of that site only.
+        """
+        try:
+            session = site.sessions.get()
+            if session is None:
+                logging.error("Could not log in to YBS site %s.", site.name)
+                return "failed", 0
+            inserted = self.update_orders(session, site)
+        except Exception:
+            logging.exception("Updating site %s failed", site.name)
+            return "failed", 0
+        return site.page_cache.status, inserted
+
+    def write_metrics(self):
+        """Save the metrics to ``metrics_file`` from the settings, if one is set."""
+        path = self.settings.get("metrics_file")
+        if not path:
+            return
+        try:
+            metrics.write(path)
+        except OSError as e:
+            logging.warning("Could not write metrics to %s: %s", path, e)
+
+    def start_retention(self):
+        """Start archiving old orders and trimming the change log."""
+        self.retention.start()
+
+    def run(self):
+        """Poll until interrupted; used by ``--headless``."""
+        self.scheduler.start()
+        self.start_retention()
+        try:
+            while self.scheduler.thread.is_alive():
+                self.scheduler.thread.join(1)
+        except KeyboardInterrupt:
+            logging.info("Stopping")
+        finally:
+            self.scheduler.stop()
+            self.retention.stop()
+            self.pool.shutdown()
+            self.worker.stop()
+            self.worker.thread.join()
+
+class YBSScraperApp(TrackerService):
+    def __init__(self, root, settings=None, db_file=None):
+        started = time.perf_counter()
+        _load_tk()
+        self.root = root
+        root.title("YBS Order Scraper")
+        super().__init__(settings, db_file)
+
+        # callbacks queued by background threads for the Tk main loop
+        self.ui_queue = queue.Queue()
+
+        self.create_gui()
+
+        # show what is already in orders.db before anything touches the network
+        self.paint_cached_state()
+        self.first_paint_ms = (time.perf_counter() - started) * 1000
+        logging.info("First paint after %.0f ms", self.first_paint_ms)
+        self.start_update_loop()
+
+    def create_gui(self):
+        # container for all controls and logs on the left side
+        self.main_area = tk.Frame(self.root)
+        self.main_area.pack(side="left", fill="both", expand=True)
+
+        self.frame = tk.Frame(self.main_area)
+        self.frame.pack(padx=10, pady=10)
+
+        tk.Label(self.frame, text="YBS Username:").grid(row=0, column=0, sticky="e")
+        self.username = tk.Entry(self.frame)
+        self.username.grid(row=0, column=1)
+        self.username.insert(0, self.settings.get("username", ""))
+
+        tk.Label(self.frame, text="YBS Password:").grid(row=1, column=0, sticky="e")
+        self.password = tk.Entry(self.frame, show="*")
+        self.password.grid(row=1, column=1)
+        self.password.insert(0, self.settings.get("password", ""))
+
+        tk.Label(self.frame, text="Base URL:").grid(row=2, column=0, sticky="e")
+        self.base_url = tk.Entry(self.frame)
+        self.base_url.grid(row=2, column=1)
+        self.base_url.insert(0, self.settings.get("base_url", "https://www.ybsnow.com"))
+
+        self.save_btn = tk.Button(self.frame, text="Save Credentials", command=self.save_creds)
+        self.save_btn.grid(row=3, column=0, columnspan=2, pady=4)
+        self.test_btn = tk.Button(self.frame, text="Test Login", command=self.test_login)
+        self.test_btn.grid(row=4, column=0, columnspan=2, pady=4)
+        tk.Label(self.frame, text="Order Number:").grid(row=5, column=0, sticky="e")
+        self.order_entry = tk.Entry(self.frame)
+        self.order_entry.grid(row=5, column=1)
+        self.scrape_btn = tk.Button(self.frame, text="Scrape & Export Order", command=self.scrape_and_export)
+        self.scrape_btn.grid(row=6, column=0, columnspan=2, pady=8)
+
+        self.view_btn = tk.Button(self.frame, text="View Orders", command=self.show_orders_window)
+        self.view_btn.grid(row=7, column=0, columnspan=2, pady=4)
+
+        self.fetch_btn = tk.Button(self.frame, text="Fetch Orders Now", command=self.manual_fetch)
+        self.fetch_btn.grid(row=8, column=0, columnspan=2, pady=4)
+
+        self.table_btn = tk.Button(self.frame, text="Show Order Table", command=self.show_current_orders)
+        self.table_btn.grid(row=9, column=0, columnspan=2, pady=4)
+
+        self.bulk_btn = tk.Button(self.frame, text="Bulk Export...", command=self.show_bulk_export)
+        self.bulk_btn.grid(row=10, column=0, columnspan=2, pady=4)
+
+        self.analytics_btn = tk.Button(
+            self.frame, text="Station Analytics", command=self.show_station_analytics
         )
-        return logged_in
+        self.analytics_btn.grid(row=11, column=0, columnspan=2, pady=4)
 
-    def parse_datetime(self, text):
-        """Parse timestamps using several known formats.
+        show_browser = self.settings.get("show_browser", True)
+        self.browser_btn = tk.Button(
+            self.frame,
+            text="Hide Browser" if show_browser else "Show Browser",
+            command=self.toggle_browser,
+        )
+        self.browser_btn.grid(row=12, column=0, columnspan=2, pady=4)
 
-        Returns a ``datetime`` object or ``None`` if ``text`` does not match any
-        supported format. Unknown strings are logged using ``logging.warning``.
-        """
+        # last record display
+        self.last_frame = tk.Frame(self.main_area)
+        self.last_frame.pack(fill="x", padx=10, pady=(0, 10))
+        tk.Label(self.last_frame, text="Order #:").grid(row=0, column=0, sticky="e")
+        self.last_order_entry = tk.Entry(self.last_frame, state="readonly", width=15)
+        self.last_order_entry.grid(row=0, column=1, padx=(0, 10))
+        tk.Label(self.last_frame, text="Workstation:").grid(row=0, column=2, sticky="e")
+        self.last_ws_entry = tk.Entry(self.last_frame, state="readonly", width=20)
+        self.last_ws_entry.grid(row=0, column=3, padx=(0, 10))
+        tk.Label(self.last_frame, text="Timestamp:").grid(row=0, column=4, sticky="e")
+        self.last_ts_entry = tk.Entry(self.last_frame, state="readonly", width=25)
+        self.last_ts_entry.grid(row=0, column=5)
 
-        formats = [
-            "%m/%d/%y %H:%M",
-            "%m/%d/%y %H:%M:%S",
-            "%m/%d/%y %I:%M %p",
-            "%m/%d/%y %I:%M:%S %p",
-            "%m/%d/%Y %H:%M",
-            "%m/%d/%Y %H:%M:%S",
-            "%m/%d/%Y %I:%M %p",
-            "%m/%d/%Y %I:%M:%S %p",
-        ]
-        for fmt in formats:
-            try:
-                return datetime.strptime(text, fmt)
-            except ValueError:
-                continue
-        logging.warning("Unrecognized datetime format: %s", text)
-        return None
+        # log of latest events
+        self.log_text = scrolledtext.ScrolledText(self.main_area, height=10)
+        self.log_text.pack(fill="both", expand=True, padx=10, pady=10)
 
-    def update_orders(self, session):
-        base = self.settings.get("base_url", "https://www.ybsnow.com").rstrip("/")
-        url = f"{base}/manage.html"
-        try:
-            resp = session.get(url, timeout=10)
-        except TypeError:
-            resp = session.get(url)
-        except requests.exceptions.RequestException as e:
-            logging.error("Failed to update orders: %s", e)
-            return 0
+        # activity log to show program operations
+        self.activity_text = scrolledtext.ScrolledText(self.main_area, height=5, state="disabled")
+        self.activity_text.pack(fill="both", expand=True, padx=10, pady=(0, 10))
 
-        resp_url = getattr(resp, "url", url)
-        if "login" in resp_url.lower() or "type=\"password\"" in resp.text.lower():
-            if self.do_login(session):
-                try:
-                    resp = session.get(url, timeout=10)
-                except TypeError:
-                    resp = session.get(url)
-                except requests.exceptions.RequestException as e:
-                    logging.error("Failed to update orders after re-login: %s", e)
-                    return 0
+        # status indicator, with the timings of the last cycle on the right
+        status_bar = tk.Frame(self.main_area)
+        status_bar.pack(fill="x", padx=10, pady=(0, 10))
+        self.status_var = tk.StringVar(value="Idle")
+        self.status_label = tk.Label(status_bar, textvariable=self.status_var, anchor="w")
+        self.status_label.pack(side="left", fill="x", expand=True)
+        self.metrics_var = tk.StringVar(value="")
+        self.metrics_label = tk.Label(status_bar, textvariable=self.metrics_var, anchor="e")
+        self.metrics_label.pack(side="right")
 
-        soup = BeautifulSoup(resp.text, "html.parser")
+        self.process_ui_queue()
 
-        inserted = 0
-        cur = self.conn.cursor()
-        seen = set()
-        now_iso = datetime.now().isoformat(sep=" ")
+        # open the manage page window after widgets are placed
+        if show_browser:
+            self.root.after(100, self.show_manage_page)
 
-        for row in soup.find_all("tr"):
-            cols = [col.get_text(strip=True) for col in row.find_all("td")]
-            if not cols or not cols[0].startswith("YBS"):
-                continue
-            parts = cols[0].split()
-            if len(parts) < 2:
-                logging.warning("Unexpected row format: %s", cols[0])
-                continue
-            order_num = parts[1]
-            seen.add(order_num)
-            timestamps = cols[-len(WORKSTATIONS) :]
-
-            values = []
-            for ws, ts in zip(WORKSTATIONS, timestamps):
-                dt = self.parse_datetime(ts)
-                iso = dt.isoformat(sep=" ") if dt else None
-                values.append(iso)
-                if dt:
-                    cur.execute(
-                        "INSERT OR IGNORE INTO events(order_num, workstation, timestamp) VALUES(?, ?, ?)",
-                        (order_num, ws, iso),
-                    )
-                    if cur.rowcount:
-                        inserted += 1
+    def show_manage_page(self):
+        """Display manage.html in a frame on the right side of the GUI."""
+        if getattr(self, "manage_frame", None):
+            self.manage_frame.pack(side="right", fill="y", padx=(0, 10), pady=10)
+            return
+        # tkinterweb is slow to import, so only load it once the window is up
+        from tkinterweb import HtmlFrame
 
-            cur.execute(
-                """
-                INSERT INTO current_orders(order_num, indigo, laminate, die_cutting_abg, machine_glue, shipping, last_seen, active)
-                VALUES(?, ?, ?, ?, ?, ?, ?, 1)
-                ON CONFLICT(order_num) DO UPDATE SET
-                    indigo=excluded.indigo,
-                    laminate=excluded.laminate,
-                    die_cutting_abg=excluded.die_cutting_abg,
-                    machine_glue=excluded.machine_glue,
-                    shipping=excluded.shipping,
-                    last_seen=excluded.last_seen,
-                    active=1
-                """,
-                (order_num, *values, now_iso),
-            )
+        self.manage_frame = tk.Frame(self.root, width=600)
+        self.manage_frame.pack(side="right", fill="y", padx=(0, 10), pady=10)
 
-        # mark orders that disappeared
-        existing = [r[0] for r in cur.execute("SELECT order_num FROM current_orders WHERE active=1")]
-        for order in set(existing) - seen:
-            cur.execute("UPDATE current_orders SET active=0 WHERE order_num=?", (order,))
+        frame = HtmlFrame(
+            self.manage_frame,
+            vertical_scrollbar=True,
+            horizontal_scrollbar=True,
+            zoom=0.8,
+        )
+        frame.pack(fill="both", expand=True)
+        self.manage_html_frame = frame
+        self.browser_digest = None
+        self.browser_rendered = float("-inf")
+        self.browser_pending = None
+        # a hidden or minimised browser catches up once it is shown again
+        self.manage_frame.bind("<Map>", lambda event: self.reload_manage_page())
+        self.reload_manage_page()
 
-        self.conn.commit()
-        return inserted
+    def toggle_browser(self):
+        """Collapse or restore the embedded browser and remember the choice.
 
-    def get_order_data(self, order_num):
-        cur = self.conn.cursor()
-        rows = list(
-            cur.execute(
-                "SELECT workstation, timestamp FROM events WHERE order_num=? ORDER BY timestamp",
-                (order_num,),
+        While it is collapsed nothing is rendered, and when it is turned off at
+        startup ``tkinterweb`` is not even loaded.
+        """
+        show = not self.settings.get("show_browser", True)
+        self.settings["show_browser"] = show
+        save_settings(self.settings)
+        if show:
+            self.show_manage_page()
+        elif getattr(self, "manage_frame", None):
+            self.manage_frame.pack_forget()
+        self.browser_btn.config(text="Hide Browser" if show else "Show Browser")
+
+    def reload_manage_page(self):
+        """Load ``manage.html`` into the embedded browser if it changed.
+
+        The copy fetched by the last ``update_orders`` call is shown, so the page
+        is only downloaded once per cycle and never from the Tk thread. Until the
+        first cycle has finished there is nothing to show. Rendering blocks the
+        Tk thread, so it is skipped while the page is unchanged or the browser
+        is hidden and happens at most every ``browser_min_interval`` seconds;
+        the scroll position is kept.
+        """
+        frame = getattr(self, "manage_html_frame", None)
+        cache = self.page_cache
+        if frame is None or cache.text is None or cache.digest == self.browser_digest:
+            return
+        if not frame.winfo_viewable():
+            return
+        interval = self.settings.get("browser_min_interval", 30)
+        wait = self.browser_rendered + interval - time.monotonic()
+        if wait > 0:
+            if self.browser_pending is None:
+                self.browser_pending = self.root.after(int(wait * 1000) + 1, self._deferred_reload)
+            return
+        with metrics.timer("render_manage_page"):
+            top = frame.yview()[0]
+            frame.load_html(cache.text, cache.url)
+            # lay the page out now so the timing includes it and the scroll sticks
+            frame.update_idletasks()
+            frame.yview_moveto(top)
+        self.browser_digest = cache.digest
+        self.browser_rendered = time.monotonic()
+
+    def _deferred_reload(self):
+        self.browser_pending = None
+        self.reload_manage_page()
+
+    def save_creds(self):
+        self.settings["username"] = self.username.get()
+        self.settings["password"] = self.password.get()
+        self.settings["base_url"] = self.base_url.get()
+        save_settings(self.settings)
+        # the shared session was authenticated with the old credentials; a
+        # cycle logging in holds the session lock, so don't wait for it here
+        threading.Thread(target=self.sessions.reset, name="session-reset", daemon=True).start()
+        messagebox.showinfo("Saved", "Credentials saved.")
+
+    def test_login(self):
+        username = self.username.get()
+        password = self.password.get()
+        base_url = self.base_url.get()
+
+        def run():
+            # the form may hold unsaved details; polling keeps its own session
+            session = requests.Session()
+            ok = self.do_login(session, username=username, password=password, base_url=base_url)
+            # the session may only replace the first site's, so compare with
+            # that site's details, which its profile can override
+            site = self.sites[0]
+            saved = (
+                site.settings.get("username"),
+                site.settings.get("password"),
+                site.settings.get("base_url", "https://www.ybsnow.com"),
             )
-        )
-        if not rows:
-            return []
+            if ok and (username, password, base_url) == saved:
+                site.sessions.adopt(session)
+            else:
+                session.close()
+            if ok:
+                self.call_in_ui(messagebox.showinfo, "Login Test", "Login successful!")
+            else:
+                self.call_in_ui(messagebox.showerror, "Login Test", "Login failed.")
 
-        parsed = [(ws, datetime.fromisoformat(ts)) for ws, ts in rows]
-        results = []
-        for i, (ws, dt) in enumerate(parsed):
-            dur = None
-            if i + 1 < len(parsed):
-                dur = (parsed[i + 1][1] - dt).total_seconds() / 3600.0
-            results.append((ws, dt.strftime("%m/%d/%y %H:%M"), dur))
-        return results
+        # logging in takes several requests; the database worker only runs SQLite work
+        threading.Thread(target=run, name="login-test", daemon=True).start()
 
     def show_orders_window(self):
         """Display a list of order numbers stored in the database."""
@@ -422,6 +2557,29 @@ class YBSScraperApp:
         win = tk.Toplevel(self.root)
         win.title("Orders")
 
+        search_frame = tk.Frame(win)
+        search_frame.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Label(search_frame, text="Find order:").pack(side="left")
+        search_var = tk.StringVar()
+        search = tk.Entry(search_frame, textvariable=search_var)
+        search.pack(side="left", fill="x", expand=True)
+        # matches appear under the search box while something is typed
+        results = tk.Listbox(win, height=6, exportselection=False)
+        self.orders_search = search_var
+        self.orders_results = results
+        self.orders_results_anchor = search_frame
+        search_var.trace_add("write", lambda *args: self.search_orders(search_var.get()))
+
+        def pick(event=None):
+            sel = results.curselection()
+            if sel:
+                self.pick_search_result(results.get(sel[0]))
+            elif results.size():
+                self.pick_search_result(results.get(0))
+
+        results.bind("<<ListboxSelect>>", pick)
+        search.bind("<Return>", pick)
+
         frame = tk.Frame(win)
         frame.pack(fill="both", expand=True, padx=10, pady=10)
 
@@ -430,7 +2588,6 @@ class YBSScraperApp:
 
         scrollbar = tk.Scrollbar(frame, command=listbox.yview)
         scrollbar.pack(side="left", fill="y")
-        listbox.config(yscrollcommand=scrollbar.set)
 
         details = scrolledtext.ScrolledText(frame, width=50)
         details.pack(side="left", fill="both", expand=True, padx=(10, 0))
@@ -438,11 +2595,22 @@ class YBSScraperApp:
         self.orders_window = win
         self.orders_listbox = listbox
         self.orders_details = details
+        self.orders_list_view = SortedKeyView(
+            insert=lambda idx, key, values: listbox.insert(idx, key),
+            update=lambda key, values: None,
+            delete=lambda idx, key: listbox.delete(idx),
+        )
+        self.orders_pager = KeysetPager(ORDER_NUMS_PAGE_SQL, ORDER_NUMS_RANGE_SQL)
+        # refreshes only look at the orders changed after this
+        self.orders_seq = latest_change(self.read_conn)
+
+        def load_page():
+            rows = self.orders_pager.next_page(self.read_conn)
+            self.orders_list_view.merge((row[0], None) for row in rows)
 
-        cur = self.conn.cursor()
-        order_nums = [row[0] for row in cur.execute("SELECT DISTINCT order_num FROM events ORDER BY order_num")]
-        for num in order_nums:
-            listbox.insert(tk.END, num)
+        listbox.config(yscrollcommand=self._paged_scroll(win, scrollbar, self.orders_pager, load_page))
+        load_page()
+        self.load_order_index()
 
         def on_select(event=None):
             sel = listbox.curselection()
@@ -454,24 +2622,100 @@ class YBSScraperApp:
         self.orders_on_select = on_select
         listbox.bind("<<ListboxSelect>>", on_select)
 
+        archived = tk.BooleanVar(value=False)
+        self.orders_archived = archived
+
+        def on_archived():
+            queries = (ORDER_NUMS_PAGE_SQL, ORDER_NUMS_RANGE_SQL)
+            self.orders_pager.reset(*(map(_archived, queries) if archived.get() else queries))
+            self.orders_list_view.apply([])
+            load_page()
+            self.load_order_index(archived.get())
+
+        tk.Checkbutton(
+            win, text="Include archived orders", variable=archived, command=on_archived
+        ).pack(anchor="w", padx=10)
+
         def on_close():
             self.orders_window = None
+            self.orders_archived = None
+            self.orders_results = None
+            self.order_index = None
             win.destroy()
 
         tk.Button(win, text="Close", command=on_close).pack(pady=4)
 
         win.protocol("WM_DELETE_WINDOW", on_close)
 
+    def load_order_index(self, archived=False):
+        """Build the search index of the Orders window on a background thread.
+
+        Searches find nothing until it is ready and are then run again.
+        """
+        index = OrderIndex(archived)
+        self.order_index = index
+
+        def run():
+            started = time.perf_counter()
+            conn = connect_db(self.db_file, readonly=True, archive=self.archive_file)
+            try:
+                index.load(conn)
+            except sqlite3.Error:
+                logging.exception("Could not build the order search index")
+                return
+            finally:
+                conn.close()
+            logging.debug(
+                "Indexed %d orders in %.1f ms",
+                len(index.keys),
+                (time.perf_counter() - started) * 1000,
+            )
+            self.call_in_ui(self._search_again)
+
+        threading.Thread(target=run, name="order-index", daemon=True).start()
+
+    def _search_again(self):
+        if getattr(self, "orders_results", None):
+            self.search_orders(self.orders_search.get())
+
+    def search_orders(self, text):
+        """Show the order numbers matching ``text`` under the search box."""
+        results = getattr(self, "orders_results", None)
+        if results is None:
+            return
+        index = getattr(self, "order_index", None)
+        with metrics.timer("order_search"):
+            matches = index.search(text) if index is not None and index.loaded else []
+            results.delete(0, tk.END)
+            if matches:
+                results.insert(tk.END, *matches)
+        if text.strip():
+            results.pack(after=self.orders_results_anchor, fill="x", padx=10)
+        else:
+            results.pack_forget()
+
+    def pick_search_result(self, order_num):
+        """Show ``order_num`` picked from the search results."""
+        listbox = self.orders_listbox
+        idx = self.orders_list_view.index(order_num)
+        listbox.selection_clear(0, tk.END)
+        if idx is not None:
+            listbox.selection_set(idx)
+            listbox.see(idx)
+        self.update_order_details(order_num)
+
     def update_order_details(self, order_num):
         """Populate the details pane for ``order_num``."""
         if not getattr(self, "orders_details", None):
             return
-        data = self.get_order_data(order_num)
+        archived = getattr(self, "orders_archived", None)
+        data = self.get_order_data(order_num, archived=bool(archived and archived.get()))
         self.orders_details.delete("1.0", tk.END)
-        for ws, end_time, dur in data:
+        for site, ws, end_time, dur in data:
             dur_str = f"{dur:.2f}" if dur is not None else ""
-            self.orders_details.insert(tk.END, f"{ws} - {end_time} - {dur_str}\n")
+            self.orders_details.insert(tk.END, f"{site} - {ws} - {end_time} - {dur_str}\n")
 
+    @metrics.timed("refresh_orders_window")
     def refresh_orders_window(self):
         """Update the order list and details pane if the window is open."""
         if not getattr(self, "orders_window", None):
@@ -480,22 +2724,50 @@ class YBSScraperApp:
             self.orders_window = None
             return
 
+        started = time.perf_counter()
         listbox = self.orders_listbox
+        view = self.orders_list_view
         cur_selection = listbox.curselection()
         selected = listbox.get(cur_selection[0]) if cur_selection else None
+        top = view.keys[listbox.nearest(0)] if view.keys else None
+
+        archived = getattr(self, "orders_archived", None)
+        archived = bool(archived and archived.get())
+        self.orders_seq, changes = self._view_changes(getattr(self, "orders_seq", None))
+        if changes is None:
+            rows = self.orders_pager.loaded_rows(self.read_conn)
+            counts = view.apply((row[0], None) for row in rows)
+        else:
+            changes = {(order_num,) for order_num, _ in changes}
+            counts = self._apply_changes(
+                view,
+                self.orders_pager,
+                changes,
+                _archived(ORDER_NUM_SQL) if archived else ORDER_NUM_SQL,
+                lambda rows: ((row[0], None) for row in rows),
+                view_key=lambda key: key[0],
+            )
 
-        cur = self.conn.cursor()
-        order_nums = [row[0] for row in cur.execute("SELECT DISTINCT order_num FROM events ORDER BY order_num")]
-
-        listbox.delete(0, tk.END)
-        for num in order_nums:
-            listbox.insert(tk.END, num)
-
-        if selected and selected in order_nums:
-            idx = order_nums.index(selected)
+        # keep the same order at the top of the list
+        top_idx = view.index(top) if top is not None else None
+        if top_idx is not None:
+            listbox.yview(top_idx)
+        idx = view.index(selected) if selected else None
+        if idx is not None:
+            listbox.selection_clear(0, tk.END)
             listbox.selection_set(idx)
             listbox.activate(idx)
-            self.update_order_details(selected)
+            if changes is None or (selected,) in changes:
+                self.update_order_details(selected)
+
+        index = getattr(self, "order_index", None)
+        if index is not None and index.loaded and index.update(self.read_conn):
+            self._search_again()
+        logging.debug(
+            "Refreshed order list (+%d ~%d -%d) in %.1f ms",
+            *counts,
+            (time.perf_counter() - started) * 1000,
+        )
 
     def show_current_orders(self):
         """Display a table of the latest order status."""
@@ -506,40 +2778,54 @@ class YBSScraperApp:
         win = tk.Toplevel(self.root)
         win.title("Current Orders")
 
-        columns = [
-            "order_num",
-            "indigo",
-            "laminate",
-            "die_cutting_abg",
-            "machine_glue",
-            "shipping",
-            "last_seen",
-            "active",
-        ]
-        headings = [
-            "Order",
-            "Indigo",
-            "Laminate",
-            "Die Cutting ABG",
-            "Machine Glue",
-            "Shipping",
-            "Last Seen",
-            "Active",
-        ]
+        columns, headings = self._current_order_columns()
 
-        tree = ttk.Treeview(win, columns=columns, show="headings")
+        frame = tk.Frame(win)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        tree = ttk.Treeview(frame, columns=columns, show="headings")
         for col, head in zip(columns, headings):
             tree.heading(col, text=head)
-        tree.pack(fill="both", expand=True, padx=10, pady=10)
+        tree.pack(side="left", fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        scrollbar.pack(side="left", fill="y")
 
         self.order_table_win = win
         self.order_tree = tree
+        self.order_tree_view = SortedKeyView(
+            # keys are (order_num, site); Treeview ids have to be strings
+            insert=lambda idx, key, values: tree.insert("", idx, iid="\t".join(key), values=values),
+            update=lambda key, values: tree.item("\t".join(key), values=values),
+            delete=lambda idx, key: tree.delete("\t".join(key)),
+        )
+        self.order_tree_pager = KeysetPager(CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL)
+        self.order_tree_seq = latest_change(self.read_conn)
 
-        self.populate_current_orders()
+        def load_page():
+            rows = self.order_tree_pager.next_page(self.read_conn)
+            self.order_tree_view.merge(self._current_order_items(rows))
+
+        tree.config(
+            yscrollcommand=self._paged_scroll(win, scrollbar, self.order_tree_pager, load_page)
+        )
+        load_page()
+
+        archived = tk.BooleanVar(value=False)
+        self.order_tree_archived = archived
+
+        def on_archived():
+            queries = (CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL)
+            self.order_tree_pager.reset(*(map(_archived, queries) if archived.get() else queries))
+            self.order_tree_view.apply([])
+            load_page()
+
+        tk.Checkbutton(
+            win, text="Include archived orders", variable=archived, command=on_archived
+        ).pack(anchor="w", padx=10)
 
         def on_close():
             self.order_table_win = None
             self.order_tree = None
+            self.order_tree_view = None
             win.destroy()
 
         tk.Button(win, text="Close", command=on_close).pack(pady=4)
@@ -547,44 +2833,263 @@ class YBSScraperApp:
         win.protocol("WM_DELETE_WINDOW", on_close)
 
     def populate_current_orders(self):
+        """Bring the Current Orders table in line with ``current_orders``.
+
+        Only the orders listed in ``order_changes`` since the last call are read
+        again, and only rows that were added, changed or removed touch the
+        ``Treeview``.
+        """
         if not getattr(self, "order_tree", None):
             return
-        tree = self.order_tree
-        cur = self.conn.cursor()
-        rows = list(
-            cur.execute(
-                """
-                SELECT order_num, indigo, laminate, die_cutting_abg, machine_glue,
-                       shipping, last_seen, active
-                FROM current_orders ORDER BY order_num
-                """
+        started = time.perf_counter()
+        self.order_tree_seq, changes = self._view_changes(getattr(self, "order_tree_seq", None))
+        if changes is None:
+            rows = self.order_tree_pager.loaded_rows(self.read_conn)
+            counts = self.order_tree_view.apply(self._current_order_items(rows))
+        else:
+            archived = getattr(self, "order_tree_archived", None)
+            counts = self._apply_changes(
+                self.order_tree_view,
+                self.order_tree_pager,
+                changes,
+                _archived(CURRENT_ORDER_SQL) if archived and archived.get() else CURRENT_ORDER_SQL,
+                self._current_order_items,
             )
+        logging.debug(
+            "Refreshed current orders (+%d ~%d -%d) in %.1f ms",
+            *counts,
+            (time.perf_counter() - started) * 1000,
         )
-        tree.delete(*tree.get_children())
-        for row in rows:
-            display = list(row)
-            display[-1] = "Yes" if row[-1] else "No"
-            tree.insert("", tk.END, values=display)
 
+    @metrics.timed("refresh_current_orders")
     def refresh_current_orders(self):
         self.populate_current_orders()
 
-    def refresh_log_display(self):
-        cur = self.conn.cursor()
-        rows = list(
-            cur.execute(
-                "SELECT order_num, workstation, timestamp FROM events ORDER BY timestamp DESC LIMIT 10"
+    def _view_changes(self, seq):
+        """Return ``(latest, keys)`` changed since ``seq``, a view's last refresh.
+
+        ``keys`` is ``None`` when the view has to be reloaded as a whole: it
+        has not been refreshed yet or the change log no longer reaches back.
+        """
+        if seq is None:
+            return latest_change(self.read_conn), None
+        return changes_since(self.read_conn, seq)
+
+    def _apply_changes(self, view, pager, keys, sql, items, view_key=tuple):
+        """Read the rows of the changed ``keys`` again and update ``view``.
+
+        Keys beyond the pages ``pager`` has loaded are skipped. ``sql`` selects
+        one row by key, ``items`` turns rows into view items and ``view_key``
+        maps a key to the one the view uses. Returns the counts of
+        :meth:`SortedKeyView.apply`.
+        """
+        rows = []
+        gone = []
+        for key in sorted(keys):
+            if not pager.loaded(key):
+                continue
+            row = self.read_conn.execute(sql, key).fetchone()
+            if row is None:
+                gone.append(view_key(key))
+            else:
+                rows.append(row)
+        return (*view.merge(items(rows)), view.remove(gone))
+
+    def _current_order_columns(self):
+        """Return the column ids and headings of the Current Orders table.
+
+        There is a column per configured workstation.
+        """
+        columns = ["order_num", "site", *self.workstations, "last_seen", "active"]
+        headings = ["Order", "Site", *self.workstations, "Last Seen", "Active"]
+        return columns, headings
+
+    def _current_order_items(self, rows):
+        """Turn ``current_orders`` rows into ``(key, values)`` for the table."""
+        workstations = self.workstations
+        for order_num, site, stations, last_seen, active in rows:
+            stations = json.loads(stations) if stations else {}
+            yield (order_num, site), (
+                order_num,
+                site,
+                *(stations.get(ws, "") for ws in workstations),
+                last_seen,
+                "Yes" if active else "No",
+            )
+
+    def _paged_scroll(self, win, scrollbar, pager, load_page):
+        """Return a ``yscrollcommand`` that loads another page near the bottom."""
+        pending = []
+
+        def load():
+            pending.clear()
+            if win.winfo_exists():
+                load_page()
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            if float(last) > 0.9 and not pager.exhausted and not pending:
+                # load outside the callback; inserting rows re-enters it
+                pending.append(win.after_idle(load))
+
+        return on_scroll
+
+    def show_station_analytics(self):
+        """Open a window with WIP, throughput and dwell times per workstation."""
+        if getattr(self, "analytics_win", None) and self.analytics_win.winfo_exists():
+            self.analytics_win.lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Station Analytics")
+        self.analytics_win = win
+
+        controls = tk.Frame(win)
+        controls.pack(fill="x", padx=10, pady=(10, 0))
+        tk.Label(controls, text="Last days:").pack(side="left")
+        self.analytics_days = ttk.Combobox(
+            controls, values=["1", "7", "30", "365"], width=5, state="readonly"
+        )
+        self.analytics_days.set("7")
+        self.analytics_days.pack(side="left", padx=(0, 10))
+        tk.Label(controls, text="Throughput per:").pack(side="left")
+        self.analytics_period = ttk.Combobox(
+            controls, values=THROUGHPUT_PERIODS, width=6, state="readonly"
+        )
+        self.analytics_period.set("day")
+        self.analytics_period.pack(side="left", padx=(0, 10))
+        for box in (self.analytics_days, self.analytics_period):
+            box.bind("<<ComboboxSelected>>", lambda event: self.refresh_station_analytics())
+        tk.Button(controls, text="Refresh", command=self.refresh_station_analytics).pack(side="left")
+
+        columns = [
+            "workstation",
+            "wip",
+            "per_hour",
+            "per_shift",
+            "per_day",
+            "p50",
+            "p90",
+            "p99",
+            "queue_hours",
+        ]
+        headings = [
+            "Workstation",
+            "WIP",
+            "/ Hour",
+            "/ Shift",
+            "/ Day",
+            "p50 h",
+            "p90 h",
+            "p99 h",
+            "Queue h",
+        ]
+        self.analytics_tree = ttk.Treeview(
+            win, columns=columns, show="headings", height=len(self.workstations)
+        )
+        for col, head in zip(columns, headings):
+            self.analytics_tree.heading(col, text=head)
+            self.analytics_tree.column(col, width=140 if col == "workstation" else 70, anchor="e")
+        self.analytics_tree.pack(fill="x", padx=10, pady=10)
+
+        self.bottleneck_var = tk.StringVar(value="Loading...")
+        tk.Label(win, textvariable=self.bottleneck_var, anchor="w").pack(fill="x", padx=10)
+
+        frame = tk.Frame(win)
+        frame.pack(fill="both", expand=True, padx=10, pady=10)
+        self.throughput_tree = ttk.Treeview(
+            frame, columns=["period", *self.workstations], show="headings"
+        )
+        self.throughput_tree.heading("period", text="Period")
+        for ws in self.workstations:
+            self.throughput_tree.heading(ws, text=ws)
+            self.throughput_tree.column(ws, width=100, anchor="e")
+        self.throughput_tree.pack(side="left", fill="both", expand=True)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.throughput_tree.yview)
+        scrollbar.pack(side="left", fill="y")
+        self.throughput_tree.config(yscrollcommand=scrollbar.set)
+
+        def on_close():
+            self.analytics_win = None
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", on_close)
+        self.refresh_station_analytics()
+
+    def refresh_station_analytics(self):
+        """Recompute the Station Analytics window in the background."""
+        if not getattr(self, "analytics_win", None):
+            return
+        days = int(self.analytics_days.get())
+        period = self.analytics_period.get()
+
+        def run():
+            started = time.perf_counter()
+            conn = connect_db(self.db_file, readonly=True)
+            try:
+                report, throughput = self.station_analytics(conn, days, period)
+            except sqlite3.Error:
+                logging.exception("Station analytics failed")
+                return
+            finally:
+                conn.close()
+            logging.debug("Station analytics took %.0f ms", (time.perf_counter() - started) * 1000)
+            self.call_in_ui(self.show_station_report, report, throughput)
+
+        threading.Thread(target=run, name="station-analytics", daemon=True).start()
+
+    def show_station_report(self, report, throughput):
+        """Fill the Station Analytics window with freshly computed results."""
+        if not getattr(self, "analytics_win", None) or not self.analytics_win.winfo_exists():
+            return
+
+        def num(value, spec=".1f"):
+            return "" if value is None else format(value, spec)
+
+        self.analytics_tree.delete(*self.analytics_tree.get_children())
+        for row in report:
+            self.analytics_tree.insert(
+                "",
+                "end",
+                values=(
+                    row["workstation"],
+                    row["wip"],
+                    num(row["per_hour"], ".2f"),
+                    num(row["per_shift"]),
+                    num(row["per_day"]),
+                    num(row["p50"]),
+                    num(row["p90"]),
+                    num(row["p99"]),
+                    num(row["queue_hours"]),
+                ),
             )
+        bottleneck = find_bottleneck(report)
+        self.bottleneck_var.set(
+            f"Bottleneck: {bottleneck}" if bottleneck else "No orders waiting at any station"
         )
+
+        # one row per period, newest first, with a column per workstation
+        periods = {}
+        for bucket, ws, count in throughput:
+            periods.setdefault(bucket, dict.fromkeys(self.workstations, 0))[ws] = count
+        self.throughput_tree.delete(*self.throughput_tree.get_children())
+        for bucket in sorted(periods, reverse=True):
+            counts = periods[bucket]
+            self.throughput_tree.insert(
+                "", "end", values=(bucket, *(counts.get(ws, 0) for ws in self.workstations))
+            )
+
+    @metrics.timed("refresh_log_display")
+    def refresh_log_display(self):
+        cur = self.read_conn.cursor()
+        rows = list(cur.execute(RECENT_EVENTS_SQL, (10,)))
         self.log_text.delete("1.0", tk.END)
         for order_num, ws, ts in rows:
             self.log_text.insert(tk.END, f"{order_num} - {ws} - {ts}\n")
 
     def refresh_last_record(self):
-        cur = self.conn.cursor()
-        row = cur.execute(
-            "SELECT order_num, workstation, timestamp FROM events ORDER BY timestamp DESC LIMIT 1"
-        ).fetchone()
+        cur = self.read_conn.cursor()
+        row = cur.execute(RECENT_EVENTS_SQL, (1,)).fetchone()
         values = row if row else ("", "", "")
         widgets = [self.last_order_entry, self.last_ws_entry, self.last_ts_entry]
         for widget, value in zip(widgets, values):
@@ -601,48 +3106,84 @@ class YBSScraperApp:
         self.activity_text.see(tk.END)
         self.activity_text.config(state="disabled")
 
-    def update_once(self, silent=False):
-        """Fetch the manage page and update order data."""
-        self.status_var.set("Updating...")
-        self.log_activity("Fetching orders")
-        session = requests.Session()
-        if self.do_login(session):
-            new_events = self.update_orders(session)
-            # fetch page to keep session current but ignore contents
-            base = self.settings.get("base_url", "https://www.ybsnow.com").rstrip("/")
+    def call_in_ui(self, fn, *args):
+        """Run ``fn(*args)`` on the Tk main thread; safe from any thread."""
+        self.ui_queue.put((fn, args))
+
+    def process_ui_queue(self):
+        """Run the callbacks queued by background threads, then reschedule."""
+        while True:
             try:
-                session.get(f"{base}/manage.html", timeout=10)
-            except TypeError:
-                session.get(f"{base}/manage.html")
+                fn, args = self.ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
             except Exception:
-                pass
-            self.reload_manage_page(session)
-            self.refresh_log_display()
-            self.refresh_last_record()
-            self.refresh_orders_window()
-            self.refresh_current_orders()
-            self.status_var.set(
-                f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                logging.exception("UI callback %s failed", getattr(fn, "__name__", fn))
+        self.root.after(50, self.process_ui_queue)
+
+    def paint_cached_state(self):
+        """Fill the window from the local database without any network access."""
+        self.refresh_log_display()
+        self.refresh_last_record()
+        self.refresh_current_orders()
+        self.status_var.set("Showing saved data; fetching orders...")
+        self.root.update_idletasks()
+
+    def refresh_views(self):
+        """Redraw everything that shows database contents."""
+        self.reload_manage_page()
+        self.refresh_log_display()
+        self.refresh_last_record()
+        self.refresh_orders_window()
+        self.refresh_current_orders()
+        self.refresh_station_analytics()
+
+    def update_once(self, silent=False):
+        """Run :meth:`TrackerService.update_once` and report it in the GUI.
+
+        Runs on a background thread; the GUI is only touched through
+        :meth:`call_in_ui`.
+        """
+        self.call_in_ui(self.status_var.set, "Updating...")
+        self.call_in_ui(self.log_activity, "Fetching orders")
+        outcome = super().update_once(silent)
+        self.call_in_ui(self.metrics_var.set, metrics.summary())
+        if outcome == "failed":
+            self.call_in_ui(self.status_var.set, "Update failed")
+            if not self.sessions.logged_in:
+                if not silent:
+                    self.call_in_ui(messagebox.showerror, "Login Failed", "Could not log in to YBS.")
+                self.call_in_ui(self.log_activity, "Login failed")
+            else:
+                self.call_in_ui(self.log_activity, "Could not fetch manage.html")
+        elif outcome == "unchanged":
+            # nothing to parse, store or redraw
+            self.call_in_ui(
+                self.status_var.set,
+                f"Last checked: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                f" (no changes, {self.page_cache.skipped} unchanged polls skipped)",
             )
-            self.log_activity(f"Update complete ({new_events} new events)")
+            self.call_in_ui(self.log_activity, "No changes on manage.html")
         else:
-            if not silent:
-                messagebox.showerror("Login Failed", "Could not log in to YBS.")
-            else:
-                logging.error("Could not log in to YBS.")
-            self.status_var.set("Update failed")
-            self.log_activity("Login failed")
-
-    def update_loop(self):
-        threading.Thread(target=lambda: self.update_once(silent=True), daemon=True).start()
-        self.root.after(60000, self.update_loop)
+            self.call_in_ui(self.refresh_views)
+            self.call_in_ui(
+                self.status_var.set,
+                f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+                f" ({self.page_cache.skipped} unchanged polls skipped)",
+            )
+            self.call_in_ui(self.log_activity, f"Update complete ({self.new_events} new events)")
+        return outcome
 
     def start_update_loop(self):
-        self.root.after(0, self.update_loop)
+        self.scheduler.start()
+        self.start_retention()
 
     def manual_fetch(self):
         """Handler for the Fetch Orders Now button."""
-        self.update_once()
+        if not self.scheduler.trigger():
+            self.log_activity("Update already in progress")
 
     def scrape_and_export(self):
         order_num = self.order_entry.get().strip()
@@ -650,13 +3191,18 @@ class YBSScraperApp:
             messagebox.showerror("Missing", "Please enter an order number.")
             return
 
-        session = requests.Session()
-        if not self.do_login(session):
-            messagebox.showerror("Error", "Login failed! Please check credentials.")
-            return
-        self.update_orders(session)
-        self.reload_manage_page(session)
+        def scrape():
+            if self.update_once(silent=True) == "failed":
+                self.call_in_ui(
+                    messagebox.showerror, "Error", "Login failed! Please check credentials."
+                )
+                return
+            self.call_in_ui(self.export_order, order_num)
 
+        threading.Thread(target=scrape, name="scrape-export", daemon=True).start()
+
+    def export_order(self, order_num):
+        """Ask for a file name and write the history of ``order_num`` as CSV."""
         data = self.get_order_data(order_num)
         if not data:
             messagebox.showinfo("Not Found", f"Order {order_num} not found in database.")
@@ -668,12 +3214,205 @@ class YBSScraperApp:
         if file_path:
             with open(file_path, "w", newline="") as csvfile:
                 writer = csv.writer(csvfile)
-                writer.writerow(["Workstation", "Completed", "Time At Station (hours)"])
-                for ws, end_time, dur in data:
-                    writer.writerow([ws, end_time, f"{dur:.2f}" if dur is not None else ""])
+                writer.writerow(["Site", "Workstation", "Completed", "Time At Station (hours)"])
+                for site, ws, end_time, dur in data:
+                    writer.writerow([site, ws, end_time, f"{dur:.2f}" if dur is not None else ""])
             messagebox.showinfo("Done", f"Exported order {order_num} data.")
 
-if __name__ == "__main__":
+    def show_bulk_export(self):
+        """Open a dialog for exporting many orders at once."""
+        if getattr(self, "bulk_export_win", None) and self.bulk_export_win.winfo_exists():
+            self.bulk_export_win.lift()
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title("Bulk Export")
+        self.bulk_export_win = win
+
+        frame = tk.Frame(win)
+        frame.pack(padx=10, pady=10)
+
+        tk.Label(frame, text="Order pattern:").grid(row=0, column=0, sticky="e")
+        pattern = tk.Entry(frame)
+        pattern.insert(0, "*")
+        pattern.grid(row=0, column=1, sticky="we")
+
+        tk.Label(frame, text="Workstation:").grid(row=1, column=0, sticky="e")
+        workstation = ttk.Combobox(frame, values=["", *self.workstations], state="readonly")
+        workstation.grid(row=1, column=1, sticky="we")
+
+        tk.Label(frame, text="Site:").grid(row=2, column=0, sticky="e")
+        site = ttk.Combobox(frame, values=["", *(s.name for s in self.sites)], state="readonly")
+        site.grid(row=2, column=1, sticky="we")
+
+        tk.Label(frame, text="From (YYYY-MM-DD):").grid(row=3, column=0, sticky="e")
+        start = tk.Entry(frame)
+        start.grid(row=3, column=1, sticky="we")
+
+        tk.Label(frame, text="To (YYYY-MM-DD):").grid(row=4, column=0, sticky="e")
+        end = tk.Entry(frame)
+        end.grid(row=4, column=1, sticky="we")
+
+        tk.Label(frame, text="Format:").grid(row=5, column=0, sticky="e")
+        fmt = ttk.Combobox(frame, values=EXPORT_FORMATS, state="readonly")
+        fmt.set(EXPORT_FORMATS[0])
+        fmt.grid(row=5, column=1, sticky="we")
+
+        compress = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Compress (gzip)", variable=compress).grid(
+            row=6, column=0, columnspan=2, sticky="w"
+        )
+        rescrape = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Fetch latest orders first", variable=rescrape).grid(
+            row=7, column=0, columnspan=2, sticky="w"
+        )
+        archived = tk.BooleanVar(value=False)
+        tk.Checkbutton(frame, text="Include archived orders", variable=archived).grid(
+            row=8, column=0, columnspan=2, sticky="w"
+        )
+
+        def on_export():
+            ext = f".{fmt.get()}" + (".gz" if compress.get() else "")
+            file_path = filedialog.asksaveasfilename(
+                parent=win, defaultextension=ext, filetypes=[("Export", f"*{ext}")]
+            )
+            if not file_path:
+                return
+            filters = {
+                "order_pattern": pattern.get().strip(),
+                "workstation": workstation.get(),
+                "site": site.get(),
+                "archived": archived.get(),
+                "start": start.get().strip(),
+                "end": end.get().strip(),
+            }
+            self.bulk_export(file_path, fmt.get(), filters, rescrape.get())
+            win.destroy()
+
+        tk.Button(frame, text="Export", command=on_export).grid(row=9, column=0, columnspan=2, pady=8)
+
+    def bulk_export(self, file_path, fmt, filters, rescrape=False):
+        """Export matching events in the background, reporting progress."""
+
+        def run():
+            conn = connect_db(self.db_file, readonly=True, archive=self.archive_file)
+            try:
+                count = export_events(
+                    conn,
+                    file_path,
+                    fmt,
+                    progress=lambda n: self.call_in_ui(self.status_var.set, f"Exporting... {n} rows"),
+                    **filters,
+                )
+            except Exception as e:
+                logging.exception("Bulk export failed")
+                self.call_in_ui(messagebox.showerror, "Export Failed", str(e))
+                self.call_in_ui(self.status_var.set, "Export failed")
+                return
+            finally:
+                conn.close()
+            self.call_in_ui(self.status_var.set, f"Exported {count} rows to {file_path}")
+            self.call_in_ui(self.log_activity, f"Bulk export finished ({count} rows)")
+
+        def start():
+            if rescrape:
+                self.update_once(silent=True)
+            run()
+
+        self.status_var.set("Exporting...")
+        threading.Thread(target=start, name="bulk-export", daemon=True).start()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track YBS orders in a local database.")
+    parser.add_argument(
+        "--headless", action="store_true", help="run the scraper without the GUI"
+    )
+    parser.add_argument("--log-file", help="write log messages to this file instead of stdout")
+    parser.add_argument(
+        "--report",
+        type=int,
+        nargs="?",
+        const=7,
+        metavar="DAYS",
+        help="print station analytics for the last DAYS days (default 7) and exit",
+    )
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="rebuild an older database once so freed space can be returned, and exit",
+    )
+    args = parser.parse_args(argv)
+
+    log_target = {"filename": args.log_file} if args.log_file else {"stream": sys.stdout}
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", **log_target
+    )
+
+    if args.report is not None:
+        if not os.path.exists(DB_FILE):
+            logging.error("No database at %s yet", DB_FILE)
+            return 1
+        settings = load_settings()
+        conn = connect_db(DB_FILE, readonly=True)
+        try:
+            report = station_report(
+                conn,
+                days=args.report,
+                shift_start=settings.get("shift_start", 6),
+                shift_hours=settings.get("shift_hours", 8),
+                workstations=configured_workstations(settings),
+            )
+        finally:
+            conn.close()
+        print(f"Station analytics for the last {args.report} days")
+        print(format_station_report(report))
+        return 0
+
+    if args.vacuum:
+        if not os.path.exists(DB_FILE):
+            logging.error("No database at %s yet", DB_FILE)
+            return 1
+        if not enable_incremental_vacuum(DB_FILE):
+            logging.info("%s already uses incremental vacuum", DB_FILE)
+        return 0
+
+    if args.headless:
+        try:
+            service = TrackerService()
+        except ValueError as e:
+            logging.error("%s", e)
+            return 1
+        missing = [
+            site.name
+            for site in service.sites
+            if not (site.settings.get("username") and site.settings.get("password"))
+        ]
+        if missing:
+            logging.error(
+                "No credentials for %s in %s; save them from the GUI first",
+                ", ".join(missing),
+                SETTINGS_FILE,
+            )
+            return 1
+        logging.info(
+            "Headless tracker started in %.0f ms", (time.perf_counter() - _IMPORT_STARTED) * 1000
+        )
+        service.run()
+        return 0
+
+    _load_tk()
     root = tk.Tk()
-    app = YBSScraperApp(root)
+    try:
+        YBSScraperApp(root)
+    except ValueError as e:
+        logging.error("%s", e)
+        root.withdraw()
+        messagebox.showerror("Invalid settings", str(e))
+        root.destroy()
+        return 1
+    logging.info("GUI started in %.0f ms", (time.perf_counter() - _IMPORT_STARTED) * 1000)
     root.mainloop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Compare two result files written by ``run.py``.
+
+Prints the median of every benchmark in both runs and the relative change.
+Exits with status 1 if any benchmark got slower by more than ``--threshold``
+percent, so it can gate a CI job::
+
+    python benchmarks/compare.py before.json after.json --threshold 15
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(old, new, threshold=10.0):
+    """Return ``(rows, regressions)`` for two loaded result files.
+
+    Each row is ``(name, old_median, new_median, change_percent)``; medians are
+    ``None`` for benchmarks missing from one of the runs.
+    """
+    rows = []
+    regressions = []
+    names = sorted(set(old["results"]) | set(new["results"]))
+    for name in names:
+        before = old["results"].get(name, {}).get("median")
+        after = new["results"].get(name, {}).get("median")
+        change = None
+        if before and after is not None:
+            change = (after - before) / before * 100
+            if change > threshold:
+                regressions.append(name)
+        rows.append((name, before, after, change))
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files.")
+    parser.add_argument("old", help="baseline results")
+    parser.add_argument("new", help="results to check")
+    parser.add_argument(
+        "--threshold", type=float, default=10.0, help="percent slowdown reported as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    rows, regressions = compare(old, new, args.threshold)
+
+    def ms(value):
+        return "-" if value is None else f"{value * 1000:.2f}"
+
+    print(f"{'benchmark':<40}{old.get('commit') or 'old':>12}{new.get('commit') or 'new':>12}{'change':>10}")
+    for name, before, after, change in rows:
+        flag = "  <-- slower" if name in regressions else ""
+        pct = "-" if change is None else f"{change:+.1f}%"
+        print(f"{name:<40}{ms(before):>12}{ms(after):>12}{pct:>10}{flag}")
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) slower than {args.threshold:g}%")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""A local stand-in for the YBS site, built on ``http.server``.
+
+It serves what the tracker relies on: a login form with hidden fields, a
+session cookie that expires, redirects back to the login page and a
+``manage.html`` (from ``manage_html.py``) whose orders move on over time.
+Latency, page size and error rate can be tuned, and the server can run on a
+simulated clock so soak tests cover hours in seconds::
+
+    python benchmarks/fake_ybs.py --orders 1000 --latency 0.2 --error-rate 0.05
+
+then point the tracker's Base URL at the printed address and log in as
+``demo`` / ``demo``.
+"""
+
+import argparse
+import html
+import random
+import secrets
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+from manage_html import generate
+
+SESSION_COOKIE = "YBSSESSID"
+
+LOGIN_PAGE = """<html><head><title>YBS Login</title></head><body>
+<form method="post" action="/login.html">
+<input type="hidden" name="csrf_token" value="{token}">
+<input type="hidden" name="return_to" value="/manage.html">
+<input type="text" name="username">
+<input type="password" name="password">
+<input type="submit" value="Log in">
+</form>{message}</body></html>"""
+
+
+class FakeYBS:
+    """State and knobs of the fake site; :meth:`start` serves it on a thread.
+
+    ``clock`` returns the current (possibly simulated) time in seconds.
+    Sessions last ``session_ttl`` seconds after logging in. Every
+    ``change_every`` seconds a tenth of the orders move on to their next stage
+    and ``new_orders`` (default 1%) new ones replace the oldest, and
+    ``error_rate`` of the ``manage.html`` requests fail with a 500 after
+    ``latency`` seconds of real time.
+    """
+
+    def __init__(
+        self,
+        username="demo",
+        password="demo",
+        orders=1000,
+        latency=0.0,
+        error_rate=0.0,
+        session_ttl=3600,
+        change_every=300,
+        new_orders=None,
+        clock=time.time,
+        seed=0,
+    ):
+        self.username = username
+        self.password = password
+        self.orders = orders
+        self.latency = latency
+        self.error_rate = error_rate
+        self.session_ttl = session_ttl
+        self.change_every = change_every
+        self.new_orders = max(1, orders // 100) if new_orders is None else new_orders
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.started = clock()
+        self.sessions = {}
+        self.tokens = set()
+        self.counts = dict.fromkeys(("requests", "logins", "failed_logins", "expired", "errors"), 0)
+        self._page = (None, None)
+        self._lock = threading.Lock()
+        self.server = None
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host="127.0.0.1", port=0):
+        """Serve on ``host:port`` (any free port by default) in a daemon thread."""
+        fake = self
+
+        class Handler(YBSRequestHandler):
+            site = fake
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="fake-ybs", daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def issue_token(self):
+        token = secrets.token_hex(8)
+        with self._lock:
+            self.tokens.add(token)
+        return token
+
+    def login(self, form):
+        """Return a new session id if ``form`` holds valid credentials."""
+        with self._lock:
+            token_ok = form.get("csrf_token") in self.tokens
+            self.tokens.discard(form.get("csrf_token"))
+            if not token_ok or (form.get("username"), form.get("password")) != (
+                self.username,
+                self.password,
+            ):
+                self.counts["failed_logins"] += 1
+                return None
+            session = secrets.token_hex(16)
+            self.sessions[session] = self.clock() + self.session_ttl
+            self.counts["logins"] += 1
+            return session
+
+    def session_valid(self, session):
+        with self._lock:
+            expires = self.sessions.get(session)
+            if expires is None:
+                return False
+            if expires <= self.clock():
+                del self.sessions[session]
+                self.counts["expired"] += 1
+                return False
+            return True
+
+    @property
+    def tick(self):
+        return int((self.clock() - self.started) // self.change_every)
+
+    def page(self):
+        """Return ``manage.html`` for the current tick, generated once per tick."""
+        tick = self.tick
+        with self._lock:
+            cached_tick, text = self._page
+            if cached_tick != tick:
+                text = generate(self.orders, tick=tick, churn=self.new_orders)
+                self._page = (tick, text)
+            return text
+
+    def should_fail(self):
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+
+class YBSRequestHandler(BaseHTTPRequestHandler):
+    site = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == SESSION_COOKIE:
+                return value
+        return None
+
+    def _send(self, status, body="", headers=()):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _login_page(self, message=""):
+        token = self.site.issue_token()
+        self._send(200, LOGIN_PAGE.format(token=token, message=html.escape(message)))
+
+    def do_GET(self):
+        site = self.site
+        site.count("requests")
+        if site.latency:
+            time.sleep(site.latency)
+        path = urllib.parse.urlsplit(self.path).path
+        if path in ("/", "/login.html"):
+            self._login_page()
+        elif path == "/manage.html":
+            if not site.session_valid(self._session()):
+                self._send(302, headers=[("Location", "/login.html?expired=1")])
+            elif site.should_fail():
+                site.count("errors")
+                self._send(500, "<html><body>Internal Server Error</body></html>")
+            else:
+                self._send(200, site.page())
+        elif path == "/logout.html":
+            self._send(302, headers=[("Location", "/login.html")])
+        else:
+            self._send(404, "<html><body>Not Found</body></html>")
+
+    def do_POST(self):
+        site = self.site
+        site.count("requests")
+        if site.latency:
+            time.sleep(site.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode("utf-8")))
+        if urllib.parse.urlsplit(self.path).path != "/login.html":
+            self._send(404, "<html><body>Not Found</body></html>")
+            return
+        session = site.login(form)
+        if session is None:
+            self._login_page("Invalid username or password")
+            return
+        self._send(
+            302,
+            headers=[
+                ("Set-Cookie", f"{SESSION_COOKIE}={session}; Path=/; HttpOnly"),
+                ("Location", form.get("return_to") or "/manage.html"),
+            ],
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a fake YBS site for load testing.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--orders", type=int, default=1000, help="orders on manage.html")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of failing page loads")
+    parser.add_argument("--session-ttl", type=float, default=3600, help="session lifetime in seconds")
+    parser.add_argument("--change-every", type=float, default=300, help="seconds between page changes")
+    parser.add_argument("--new-orders", type=int, help="orders added per change (default 1%%)")
+    args = parser.parse_args(argv)
+
+    site = FakeYBS(
+        orders=args.orders,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        session_ttl=args.session_ttl,
+        change_every=args.change_every,
+        new_orders=args.new_orders,
+    ).start(port=args.port)
+    print(f"Fake YBS serving on {site.url} (login demo / demo); Ctrl+C to stop")
+    try:
+        site.thread.join()
+    except KeyboardInterrupt:
+        site.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
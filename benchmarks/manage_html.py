@@ -0,0 +1,104 @@
+"""Generate synthetic ``manage.html`` pages for benchmarks and tests.
+
+The pages look like the real YBS order list: a header row, a few
+descriptive columns before the five workstation timestamps, links and
+comments inside cells, every timestamp format ``parse_datetime`` accepts,
+empty cells for stages not reached yet and the occasional garbage value.
+
+Usage::
+
+    python benchmarks/manage_html.py 10000 > manage.html
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import WORKSTATIONS
+
+SIZES = (10, 1000, 10000, 100000)
+
+# one strftime pattern per entry of OrderTracker.DATETIME_FORMATS
+TIMESTAMP_FORMATS = (
+    "%m/%d/%y %H:%M",
+    "%m/%d/%y %H:%M:%S",
+    "%m/%d/%y %I:%M %p",
+    "%m/%d/%y %I:%M:%S %p",
+    "%m/%d/%Y %H:%M",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %I:%M %p",
+    "%m/%d/%Y %I:%M:%S %p",
+)
+CUSTOMERS = ("Acme Packaging", "Northwind", "Globex", "Initech", "Umbrella Print")
+START = datetime(2023, 9, 1, 6, 0)
+
+
+def order_stages(order, seed=0, tick=0):
+    """Return the timestamp cells of ``order`` after ``tick`` updates.
+
+    The result only depends on its arguments, so pages generated with a higher
+    ``tick`` show the same orders with more stages completed; each tick moves
+    one order in ten on to its next stage.
+    """
+    rng = random.Random(seed * 1_000_003 + order)
+    advanced = sum(1 for t in range(tick) if (order + t) % 10 == 0)
+    reached = min(len(WORKSTATIONS), rng.randint(0, len(WORKSTATIONS)) + advanced)
+    fmt = rng.choice(TIMESTAMP_FORMATS)
+    when = START + timedelta(minutes=order * 3)
+    cells = []
+    for stage in range(len(WORKSTATIONS)):
+        when += timedelta(minutes=rng.randint(20, 600))
+        if stage >= reached:
+            cells.append("")
+        elif rng.random() < 0.001:
+            cells.append("n/a")
+        else:
+            cells.append(when.strftime(fmt))
+    return cells
+
+
+def generate(orders, seed=0, tick=0, churn=0):
+    """Return a ``manage.html`` page listing ``orders`` orders.
+
+    With ``churn`` that many new orders appear at every tick and the oldest
+    ones drop off the page, as on the live site.
+    """
+    parts = [
+        "<html><head><title>Manage Orders</title></head><body>",
+        '<a href="/logout.html">Logout</a>',
+        '<table class="orders">',
+        "<tr><th>Order</th><th>Customer</th><th>Description</th>"
+        + "".join(f"<th>{ws}</th>" for ws in WORKSTATIONS)
+        + "</tr>",
+    ]
+    first = tick * churn
+    for order in range(first, first + orders):
+        number = 100000 + order
+        # ticks since the order first appeared on the page
+        age = tick - max(0, -(-(order - orders + 1) // churn)) if churn else tick
+        cells = "".join(f"<td>{cell}</td>" for cell in order_stages(order, seed, age))
+        parts.append(
+            f'<tr class="row{order % 2}"><td>YBS {number}</td>'
+            f"<td>{CUSTOMERS[order % len(CUSTOMERS)]}</td>"
+            f'<td><a href="/order.html?id={number}">Folding carton</a><!-- qty --></td>'
+            f"{cells}</tr>"
+        )
+    parts.append("</table></body></html>")
+    return "\n".join(parts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("orders", type=int, help="number of orders on the page")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tick", type=int, default=0, help="updates applied since the first page")
+    parser.add_argument("--churn", type=int, default=0, help="new orders per tick")
+    args = parser.parse_args(argv)
+    sys.stdout.write(generate(args.orders, args.seed, args.tick, args.churn))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Time the hot paths of OrderTracker against an on-disk database.
+
+Each benchmark runs against a fresh ``orders.db`` in a temporary directory
+filled from a generated ``manage.html`` (see ``manage_html.py``). Results
+are written as JSON so ``compare.py`` can diff two runs::
+
+    python benchmarks/run.py -o before.json
+    git checkout my-branch
+    python benchmarks/run.py -o after.json
+    python benchmarks/compare.py before.json after.json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import OrderTracker
+from OrderTracker import (
+    CURRENT_ORDERS_PAGE_SQL,
+    CURRENT_ORDERS_RANGE_SQL,
+    KeysetPager,
+    SortedKeyView,
+    TrackerService,
+    YBSScraperApp,
+    extract_rows,
+)
+from manage_html import SIZES, generate
+
+
+class PageSession:
+    """Stand-in for ``requests.Session`` that always returns ``html``."""
+
+    def __init__(self, html):
+        self.html = html
+
+    def get(self, url, headers=None, timeout=None):
+        return PageResponse(self.html, url)
+
+
+class PageResponse:
+    def __init__(self, text, url):
+        self.text = text
+        self.url = url
+        self.status_code = 200
+        self.headers = {}
+
+
+def measure(fn, repeat, setup=None):
+    """Call ``fn`` ``repeat`` times and return timing statistics in seconds.
+
+    ``setup`` is called before every run and is not timed.
+    """
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return {"min": min(times), "median": statistics.median(times), "runs": repeat}
+
+
+def bench_update_orders(service, orders, repeat):
+    """First load, a page where a tenth of the orders moved on, and a repeat."""
+    results = {}
+    pages = [generate(orders, tick=tick) for tick in range(repeat + 1)]
+
+    def run(html):
+        service.worker.submit(service.update_orders, PageSession(html)).result()
+
+    results["update_orders.initial"] = measure(lambda: run(pages[0]), 1)
+    changed = iter(pages[1:])
+    results["update_orders.changed"] = measure(lambda: run(next(changed)), repeat)
+    results["update_orders.unchanged"] = measure(lambda: run(pages[-1]), repeat)
+    return results
+
+
+def bench_parse_datetime(service, orders, repeat):
+    cells = [ts for _, stamps in extract_rows(generate(orders)) for ts in stamps]
+
+    def parse():
+        for ts in cells:
+            service.parse_datetime(ts)
+
+    def cold():
+        OrderTracker._parse_datetime.cache_clear()
+        parse()
+
+    return {
+        "parse_datetime.cold": measure(cold, repeat),
+        "parse_datetime.warm": measure(parse, repeat),
+    }
+
+
+def bench_get_order_data(service, orders, repeat, lookups=1000):
+    rng = random.Random(0)
+    numbers = [str(100000 + rng.randrange(orders)) for _ in range(lookups)]
+
+    def lookup():
+        for number in numbers:
+            service.get_order_data(number)
+
+    return {"get_order_data.x1000": measure(lookup, repeat)}
+
+
+def bench_populate_current_orders(service, orders, repeat):
+    """Refresh a Current Orders table that has every order loaded.
+
+    ``populate_current_orders`` reloads the whole table; the ``.changed``
+    variant follows ``order_changes`` after a tenth of the orders moved on. A
+    real ``ttk.Treeview`` is used when a display is available; otherwise only
+    the query and diffing work is timed and the result says so.
+    """
+    app = YBSScraperApp.__new__(YBSScraperApp)
+    app.settings = service.settings
+    app.read_conn = service.read_conn
+    root = None
+    try:
+        import tkinter
+        from tkinter import ttk
+
+        root = tkinter.Tk()
+        root.withdraw()
+        columns, _ = app._current_order_columns()
+        tree = ttk.Treeview(root, columns=columns, show="headings")
+        callbacks = {
+            "insert": lambda idx, key, values: tree.insert("", idx, iid=key, values=values),
+            "update": lambda key, values: tree.item(key, values=values),
+            "delete": lambda idx, key: tree.delete(key),
+        }
+        app.order_tree = tree
+    except Exception:
+        callbacks = {
+            "insert": lambda idx, key, values: None,
+            "update": lambda key, values: None,
+            "delete": lambda idx, key: None,
+        }
+        app.order_tree = object()
+    app.order_tree_view = SortedKeyView(**callbacks)
+    app.order_tree_pager = KeysetPager(CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL)
+    while True:
+        rows = app.order_tree_pager.next_page(service.read_conn)
+        if not rows:
+            break
+        app.order_tree_view.merge(app._current_order_items(rows))
+    # bench_update_orders left the database at tick ``repeat``
+    pages = iter(generate(orders, tick=tick) for tick in range(repeat + 1, 2 * repeat + 1))
+
+    def full():
+        app.order_tree_seq = None
+
+    def next_page():
+        service.worker.submit(service.update_orders, PageSession(next(pages))).result()
+
+    try:
+        results = {
+            "populate_current_orders": measure(app.populate_current_orders, repeat, full),
+            "populate_current_orders.changed": measure(
+                app.populate_current_orders, repeat, next_page
+            ),
+        }
+    finally:
+        if root is not None:
+            root.destroy()
+    for result in results.values():
+        result["tk"] = root is not None
+    return results
+
+
+BENCHMARKS = (
+    bench_update_orders,
+    bench_parse_datetime,
+    bench_get_order_data,
+    bench_populate_current_orders,
+)
+
+
+def run_size(orders, repeat):
+    """Run every benchmark against a new database of ``orders`` orders."""
+    with tempfile.TemporaryDirectory() as tmp:
+        service = TrackerService(settings={"base_url": "http://bench"}, db_file=f"{tmp}/orders.db")
+        try:
+            results = {}
+            for bench in BENCHMARKS:
+                results.update(bench(service, orders, repeat))
+        finally:
+            service.worker.stop()
+            service.worker.thread.join()
+            service.read_conn.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parents[1],
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the OrderTracker benchmarks.")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=list(SIZES), help="orders per generated page"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON file to write")
+    args = parser.parse_args(argv)
+    # the generated pages contain a few bad timestamps on purpose
+    logging.basicConfig(level=logging.ERROR)
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "results": {},
+    }
+    for orders in args.sizes:
+        for name, result in run_size(orders, args.repeat).items():
+            key = f"{name}[{orders}]"
+            report["results"][key] = result
+            print(f"{key:<40} {result['median'] * 1000:10.2f} ms")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=1)
+    print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Run the real scheduler, login and scrape pipeline against the fake site.
+
+Time is simulated: after each cycle the clock shared by the scheduler loop
+and ``fake_ybs.FakeYBS`` jumps ahead by the delay the scheduler asked for,
+so sessions expire and the page changes as they would over hours of
+polling. The report covers cycle latency, memory growth and database
+size::
+
+    python benchmarks/soak.py --hours 24 --orders 2000 --error-rate 0.02 -o soak.json
+"""
+
+import argparse
+import collections
+import json
+import logging
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+sys.path.append(str(Path(__file__).resolve().parent))
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import TrackerService
+from fake_ybs import FakeYBS
+
+
+class SimulatedClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)] if ordered else None
+
+
+def _memory(trace):
+    """Return ``(current, peak)`` bytes: the Python heap when tracing, else RSS."""
+    if trace:
+        return tracemalloc.get_traced_memory()
+    if resource is None:
+        return 0, 0
+    # ru_maxrss is a high-water mark, in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return peak, peak
+
+
+def soak(hours=8, orders=1000, error_rate=0.0, latency=0.0, session_ttl=3600,
+         change_every=300, poll_interval=60, db_dir=None, seed=0, trace_memory=False):
+    """Poll the fake site for ``hours`` of simulated time; return a report dict.
+
+    Memory growth is the peak RSS gained after the first cycle, or with
+    ``trace_memory`` the growth of the Python heap as seen by ``tracemalloc``,
+    which is exact but makes every cycle several times slower.
+    """
+    clock = SimulatedClock()
+    site = FakeYBS(
+        orders=orders,
+        latency=latency,
+        error_rate=error_rate,
+        session_ttl=session_ttl,
+        change_every=change_every,
+        clock=clock,
+        seed=seed,
+    ).start()
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        db_file = os.path.join(tmp, "orders.db")
+        service = TrackerService(
+            settings={
+                "username": site.username,
+                "password": site.password,
+                "base_url": site.url,
+                "poll_interval": poll_interval,
+            },
+            db_file=db_file,
+        )
+        scheduler = service.scheduler
+        scheduler.random = random.Random(seed).random
+        outcomes = collections.Counter()
+        cycle = scheduler.cycle
+
+        def counted(manual):
+            outcome = cycle(manual)
+            outcomes[outcome] += 1
+            return outcome
+
+        scheduler.cycle = counted
+        latencies = []
+        if trace_memory:
+            tracemalloc.start()
+        try:
+            end = clock.now + hours * 3600
+            memory_start = None
+            while clock.now < end:
+                started = time.perf_counter()
+                delay = scheduler.step()
+                latencies.append(time.perf_counter() - started)
+                if memory_start is None:
+                    # measure growth from after the first full load
+                    memory_start = _memory(trace_memory)[0]
+                clock.advance(delay)
+            memory_end, memory_peak = _memory(trace_memory)
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+            service.worker.stop()
+            service.worker.thread.join()
+            service.read_conn.close()
+            site.stop()
+        db_bytes = sum(
+            os.path.getsize(path)
+            for path in (db_file, f"{db_file}-wal")
+            if os.path.exists(path)
+        )
+
+    return {
+        "simulated_hours": hours,
+        "orders": orders,
+        "cycles": len(latencies),
+        "outcomes": dict(outcomes),
+        "site": dict(site.counts),
+        "cycle_seconds": {
+            "median": statistics.median(latencies),
+            "p90": _percentile(latencies, 0.9),
+            "p99": _percentile(latencies, 0.99),
+            "max": max(latencies),
+        },
+        "memory_growth_bytes": memory_end - memory_start,
+        "memory_peak_bytes": memory_peak,
+        "memory_source": "tracemalloc" if trace_memory else "rss",
+        "db_bytes": db_bytes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test the tracker against the fake site.")
+    parser.add_argument("--hours", type=float, default=8, help="simulated hours to poll for")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="real seconds per request")
+    parser.add_argument("--session-ttl", type=float, default=3600)
+    parser.add_argument("--change-every", type=float, default=300)
+    parser.add_argument("--poll-interval", type=float, default=60)
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="measure the Python heap with tracemalloc"
+    )
+    parser.add_argument("-o", "--output", help="also write the report to this JSON file")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+
+    report = soak(
+        hours=args.hours,
+        orders=args.orders,
+        error_rate=args.error_rate,
+        latency=args.latency,
+        session_ttl=args.session_ttl,
+        change_every=args.change_every,
+        poll_interval=args.poll_interval,
+        trace_memory=args.trace_memory,
+    )
+    text = json.dumps(report, indent=1)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+import sqlite3
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import Site, SortedKeyView, YBSScraperApp, migrate, site_profiles
+
+
+class FakeList:
+    """Stands in for a Listbox/Treeview and records every operation."""
+
+    def __init__(self):
+        self.items = []
+        self.ops = []
+
+    def view(self):
+        return SortedKeyView(self.insert, self.update, self.delete)
+
+    def insert(self, idx, key, values):
+        self.items.insert(idx, (key, values))
+        self.ops.append(("insert", key))
+
+    def update(self, key, values):
+        idx = [k for k, _ in self.items].index(key)
+        self.items[idx] = (key, values)
+        self.ops.append(("update", key))
+
+    def delete(self, idx, key):
+        assert self.items[idx][0] == key
+        del self.items[idx]
+        self.ops.append(("delete", key))
+
+
+class DummyResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class DummySession:
+    def __init__(self, text):
+        self.text = text
+
+    def get(self, url):
+        return DummyResponse(self.text)
+
+
+class InlineWorker:
+    """Stands in for the DBWorker and runs every job on the calling thread."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.thread = threading.current_thread()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@pytest.fixture
+def app():
+    """An app without a window, backed by an in-memory database."""
+    app = YBSScraperApp.__new__(YBSScraperApp)
+    app.settings = {"base_url": "http://example.com"}
+    app.conn = sqlite3.connect(":memory:")
+    app.read_conn = app.conn
+    app.worker = InlineWorker(app.conn)
+    app.sites = [Site(profile, app.settings, app.do_login) for profile in site_profiles(app.settings)]
+    app.sessions = app.sites[0].sessions
+    app.page_cache = app.sites[0].page_cache
+    migrate(app.conn)
+    yield app
+    app.conn.close()
+
+
+@pytest.fixture
+def fake_list():
+    return FakeList()
+
+
+@pytest.fixture
+def dummy_session():
+    """Return a factory for sessions that always serve the given page."""
+    return DummySession
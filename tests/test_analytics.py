@@ -0,0 +1,113 @@
+import json
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import (
+    connect_db,
+    find_bottleneck,
+    format_station_report,
+    main,
+    migrate,
+    station_report,
+    station_throughput,
+)
+
+NOW = datetime(2023, 9, 8, 6, 0)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO events(order_num, workstation, timestamp) VALUES(?, ?, ?)",
+        [
+            ("1001", "Indigo", "2023-09-07 07:00:00"),
+            ("1001", "Laminate", "2023-09-07 09:00:00"),
+            ("1002", "Indigo", "2023-09-07 15:00:00"),
+            ("1003", "Indigo", "2023-09-08 05:00:00"),
+            # outside a one day window
+            ("0999", "Indigo", "2023-09-01 08:00:00"),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO stage_durations(order_num, workstation, timestamp, hours) VALUES(?, ?, ?, ?)",
+        [
+            ("1001", "Indigo", "2023-09-07 07:00:00", 2.0),
+            ("1001", "Laminate", "2023-09-07 09:00:00", None),
+            ("1002", "Indigo", "2023-09-07 15:00:00", 1.0),
+            ("1003", "Indigo", "2023-09-08 05:00:00", 4.0),
+            ("0999", "Indigo", "2023-09-01 08:00:00", 100.0),
+        ],
+    )
+    conn.executemany(
+        "INSERT INTO current_orders(order_num, active) VALUES(?, ?)",
+        [("1001", 1), ("1002", 1), ("1003", 1), ("1004", 1), ("0999", 0)],
+    )
+    conn.executemany(
+        "INSERT INTO order_stations(order_num, workstation, timestamp) VALUES(?, ?, ?)",
+        [
+            ("1001", "Indigo", "2023-09-07 07:00:00"),
+            ("1001", "Laminate", "2023-09-07 09:00:00"),
+            ("1002", "Indigo", "2023-09-07 15:00:00"),
+            ("1003", "Indigo", "2023-09-08 05:00:00"),
+            ("0999", "Indigo", "2023-09-01 08:00:00"),
+        ],
+    )
+    return conn
+
+
+def test_station_report(conn):
+    report = {row["workstation"]: row for row in station_report(conn, now=NOW, days=1)}
+    indigo = report["Indigo"]
+    assert indigo["wip"] == 1
+    assert indigo["completed"] == 3
+    assert indigo["per_day"] == pytest.approx(3)
+    assert indigo["per_shift"] == pytest.approx(1)
+    assert (indigo["p50"], indigo["p90"], indigo["p99"]) == (2.0, 4.0, 4.0)
+
+    laminate = report["Laminate"]
+    assert laminate["wip"] == 2
+    assert laminate["completed"] == 1
+    assert laminate["p50"] is None
+    assert laminate["queue_hours"] == pytest.approx(48)
+
+    assert report["Die Cutting ABG"]["wip"] == 1
+    assert report["Die Cutting ABG"]["queue_hours"] is None
+    # nothing is completed there, so its queue never clears
+    assert find_bottleneck(report.values()) == "Die Cutting ABG"
+    assert "Bottleneck: Die Cutting ABG" in format_station_report(list(report.values()))
+
+
+@pytest.mark.parametrize(
+    "period, expected",
+    [
+        ("day", [("2023-09-07", "Indigo", 2), ("2023-09-07", "Laminate", 1), ("2023-09-08", "Indigo", 1)]),
+        # the 05:00 event belongs to the night shift that started on the 7th
+        ("shift", [("2023-09-07 #1", "Indigo", 1), ("2023-09-07 #1", "Laminate", 1),
+                   ("2023-09-07 #2", "Indigo", 1), ("2023-09-07 #3", "Indigo", 1)]),
+        ("hour", [("2023-09-07 07", "Indigo", 1), ("2023-09-07 09", "Laminate", 1),
+                  ("2023-09-07 15", "Indigo", 1), ("2023-09-08 05", "Indigo", 1)]),
+    ],
+)
+def test_station_throughput(conn, period, expected):
+    assert station_throughput(conn, period, now=NOW, days=2) == expected
+
+
+def test_unknown_period(conn):
+    with pytest.raises(ValueError):
+        station_throughput(conn, "week")
+
+
+def test_report_uses_configured_workstations(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text(json.dumps({"workstations": ["Print", "Pack"]}))
+    connect_db("orders.db").close()
+    assert main(["--report", "1"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[2:4]] == ["Print", "Pack"]
@@ -0,0 +1,56 @@
+import copy
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "benchmarks"))
+import compare
+import run
+from manage_html import generate
+from OrderTracker import ROW_EXTRACTORS, WORKSTATIONS, _parse_datetime, extract_rows
+
+
+def test_generated_page_parses_with_every_extractor():
+    html = generate(200)
+    rows = list(extract_rows(html, "bs4"))
+    assert len(rows) == 200
+    assert all(len(stamps) == len(WORKSTATIONS) for _, stamps in rows)
+    for engine in ROW_EXTRACTORS:
+        assert list(extract_rows(html, engine)) == rows
+
+    cells = [ts for _, stamps in rows for ts in stamps]
+    assert "" in cells
+    assert any(ts and _parse_datetime(ts) for ts in cells)
+
+
+def test_later_ticks_only_add_stages():
+    before = dict(extract_rows(generate(50)))
+    after = dict(extract_rows(generate(50, tick=1)))
+    assert before != after
+    for order, stamps in before.items():
+        done = [ts for ts in stamps if ts]
+        assert [ts for ts in after[order] if ts][: len(done)] == done
+
+
+def test_run_and_compare(tmp_path):
+    out = tmp_path / "results.json"
+    assert run.main(["--sizes", "10", "--repeat", "1", "-o", str(out)]) == 0
+    results = json.loads(out.read_text())
+    assert {
+        "update_orders.initial[10]",
+        "update_orders.changed[10]",
+        "update_orders.unchanged[10]",
+        "parse_datetime.cold[10]",
+        "get_order_data.x1000[10]",
+        "populate_current_orders[10]",
+    } <= set(results["results"])
+
+    slower = copy.deepcopy(results)
+    slower["results"]["parse_datetime.cold[10]"]["median"] *= 2
+    slower_path = tmp_path / "slower.json"
+    slower_path.write_text(json.dumps(slower))
+    assert compare.main([str(out), str(out)]) == 0
+    assert compare.main([str(out), str(slower_path)]) == 1
+    rows, regressions = compare.compare(results, slower)
+    assert regressions == ["parse_datetime.cold[10]"]
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import ManagePageCache, YBSScraperApp, metrics
+
+
+class FakeHtmlFrame:
+    """Records what the embedded browser was asked to do."""
+
+    def __init__(self):
+        self.visible = True
+        self.top = 0.0
+        self.loads = []
+        self.moves = []
+
+    def winfo_viewable(self):
+        return self.visible
+
+    def yview(self):
+        return (self.top, self.top + 0.1)
+
+    def load_html(self, text, url):
+        self.loads.append(text)
+        self.top = 0.0
+
+    def update_idletasks(self):
+        pass
+
+    def yview_moveto(self, top):
+        self.moves.append(top)
+        self.top = top
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+        return len(self.scheduled)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.headers = {}
+
+
+def _get_app():
+    app = YBSScraperApp.__new__(YBSScraperApp)
+    app.settings = {"browser_min_interval": 30}
+    app.root = FakeRoot()
+    app.page_cache = ManagePageCache()
+    app.manage_html_frame = FakeHtmlFrame()
+    app.browser_digest = None
+    app.browser_rendered = float("-inf")
+    app.browser_pending = None
+    return app
+
+
+def _page(app, text):
+    app.page_cache.store(Response(text), "http://ybs/manage.html")
+
+
+def test_renders_only_changed_pages_and_keeps_scroll():
+    app = _get_app()
+    frame = app.manage_html_frame
+    app.reload_manage_page()
+    assert frame.loads == []
+
+    metrics.reset()
+    _page(app, "<p>one</p>")
+    app.reload_manage_page()
+    assert frame.loads == ["<p>one</p>"]
+    assert metrics.snapshot()["phases"]["render_manage_page"]["count"] == 1
+
+    # the same page again is not rendered, however long ago the last render was
+    app.browser_rendered -= 60
+    app.reload_manage_page()
+    assert frame.loads == ["<p>one</p>"]
+
+    frame.top = 0.4
+    _page(app, "<p>two</p>")
+    app.reload_manage_page()
+    assert frame.loads[-1] == "<p>two</p>"
+    assert frame.top == 0.4
+
+
+def test_hidden_browser_catches_up_when_shown():
+    app = _get_app()
+    frame = app.manage_html_frame
+    frame.visible = False
+    _page(app, "<p>one</p>")
+    app.reload_manage_page()
+    assert frame.loads == []
+
+    # what the <Map> binding does
+    frame.visible = True
+    app.reload_manage_page()
+    assert frame.loads == ["<p>one</p>"]
+
+
+def test_renders_are_rate_limited():
+    app = _get_app()
+    frame = app.manage_html_frame
+    _page(app, "<p>one</p>")
+    app.reload_manage_page()
+
+    _page(app, "<p>two</p>")
+    app.reload_manage_page()
+    _page(app, "<p>three</p>")
+    app.reload_manage_page()
+    assert frame.loads == ["<p>one</p>"]
+    # one deferred render, due when the interval is over
+    assert len(app.root.scheduled) == 1
+    ms, callback = app.root.scheduled[0]
+    assert 29000 < ms <= 30001
+
+    app.browser_rendered -= 30
+    callback()
+    assert frame.loads == ["<p>one</p>", "<p>three</p>"]
+    assert app.browser_pending is None
@@ -0,0 +1,47 @@
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import DBWorker, connect_db
+
+
+def test_jobs_run_on_the_worker_thread(tmp_path):
+    path = tmp_path / "orders.db"
+    worker = DBWorker(str(path))
+    try:
+        def insert():
+            worker.conn.execute(
+                "INSERT INTO events(order_num, workstation, timestamp)"
+                " VALUES('1001', 'Indigo', '2023-09-05 14:30:00')"
+            )
+            worker.conn.commit()
+            return threading.current_thread().name
+
+        assert worker.submit(insert).result(timeout=5) == "db-worker"
+        with pytest.raises(sqlite3.ProgrammingError):
+            worker.conn.execute("SELECT 1")
+
+        reader = connect_db(str(path), readonly=True)
+        assert reader.execute("SELECT order_num FROM events").fetchall() == [("1001",)]
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM events")
+    finally:
+        worker.stop()
+        worker.thread.join(timeout=5)
+
+
+def test_failed_job_sets_exception(tmp_path):
+    worker = DBWorker(str(tmp_path / "orders.db"))
+    try:
+        future = worker.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=5)
+        # the worker keeps running after a failure
+        assert worker.submit(lambda: 42).result(timeout=5) == 42
+    finally:
+        worker.stop()
+        worker.thread.join(timeout=5)
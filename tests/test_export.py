@@ -0,0 +1,59 @@
+import csv
+import gzip
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import export_events, migrate
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO stage_durations(order_num, workstation, timestamp, hours) VALUES(?, ?, ?, ?)",
+        [
+            ("1001", "Indigo", "2023-09-05 14:30:00", 42.5),
+            ("1001", "Shipping", "2023-09-07 09:00:00", None),
+            ("1002", "Indigo", "2023-09-06 08:00:00", None),
+            ("2001", "Indigo", "2023-09-05 10:00:00", None),
+        ],
+    )
+    return conn
+
+
+def test_csv_export_with_filters(conn, tmp_path):
+    path = str(tmp_path / "out.csv")
+    count = export_events(
+        conn, path, order_pattern="100*", workstation="Indigo", start="2023-09-05", end="2023-09-06"
+    )
+    assert count == 2
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["Order", "Workstation", "Completed", "Time At Station (hours)", "Site"],
+        ["1001", "Indigo", "2023-09-05 14:30:00", "42.50", "default"],
+        ["1002", "Indigo", "2023-09-06 08:00:00", "", "default"],
+    ]
+
+
+def test_gzip_jsonl_export_streams_in_batches(conn, tmp_path):
+    path = str(tmp_path / "out.jsonl.gz")
+    progress = []
+    assert export_events(conn, path, batch_size=3, progress=progress.append) == 4
+    assert progress == [3, 4]
+    with gzip.open(path, "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert records[0] == {
+        "order": "1001",
+        "workstation": "Indigo",
+        "completed": "2023-09-05 14:30:00",
+        "hours": 42.5,
+        "site": "default",
+    }
+    assert [r["order"] for r in records] == ["1001", "1001", "1002", "2001"]
@@ -0,0 +1,151 @@
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+sys.path.append(str(Path(__file__).resolve().parents[1] / "benchmarks"))
+from fake_ybs import FakeYBS
+from soak import SimulatedClock, soak
+from OrderTracker import TrackerService, main
+
+
+@pytest.fixture
+def clock():
+    return SimulatedClock()
+
+
+@pytest.fixture
+def site(clock):
+    site = FakeYBS(orders=50, session_ttl=600, change_every=60, clock=clock).start()
+    yield site
+    site.stop()
+
+
+@pytest.fixture
+def service(site, tmp_path):
+    settings = {"username": "demo", "password": "demo", "base_url": site.url}
+    service = TrackerService(settings=settings, db_file=str(tmp_path / "orders.db"))
+    yield service
+    service.worker.stop()
+    service.worker.thread.join()
+    service.read_conn.close()
+
+
+def _cycle(service):
+    return service.update_once()
+
+
+def _active_orders(service):
+    return service.read_conn.execute(
+        "SELECT COUNT(*) FROM current_orders WHERE active=1"
+    ).fetchone()[0]
+
+
+def test_login_and_scrape(site, service):
+    assert _cycle(service) == "changed"
+    assert site.counts["logins"] == 1
+    assert _active_orders(service) == 50
+    assert _cycle(service) == "unchanged"
+
+
+def test_wrong_password_fails(site, service, caplog, capsys):
+    service.settings["password"] = "nope"
+    with caplog.at_level(logging.WARNING):
+        assert _cycle(service) == "failed"
+    assert site.counts["failed_logins"] == 1
+    # headless runs log to a file; the failure must land there, not on stdout
+    assert any("logged_in=False" in record.getMessage() for record in caplog.records)
+    assert capsys.readouterr().out == ""
+
+
+def test_expired_session_logs_in_again(site, service, clock):
+    assert _cycle(service) == "changed"
+    clock.advance(601)
+    assert _cycle(service) == "changed"
+    assert site.counts["expired"] == 1
+    assert site.counts["logins"] == 2
+
+
+def test_server_error_keeps_orders_active(site, service, clock):
+    assert _cycle(service) == "changed"
+    site.error_rate = 1.0
+    clock.advance(60)
+    assert _cycle(service) == "failed"
+    assert _active_orders(service) == 50
+
+
+def test_short_soak(tmp_path):
+    report = soak(
+        hours=2, orders=100, error_rate=0.05, session_ttl=1800, change_every=120, db_dir=tmp_path
+    )
+    assert report["cycles"] >= 60
+    assert report["outcomes"].get("failed", 0) == report["site"]["errors"]
+    assert report["outcomes"]["changed"] > 1
+    assert report["site"]["logins"] >= 4
+    assert report["db_bytes"] > 0
+
+
+def test_sites_are_scraped_concurrently(clock, tmp_path):
+    fast = FakeYBS(orders=20, latency=0.2, change_every=60, clock=clock).start()
+    slow = FakeYBS(password="other", orders=30, latency=0.2, change_every=60, clock=clock).start()
+    settings = {
+        "username": "demo",
+        "password": "demo",
+        "sites": [
+            {"name": "north", "base_url": fast.url},
+            {"name": "south", "base_url": slow.url, "password": "other"},
+        ],
+    }
+    service = TrackerService(settings=settings, db_file=str(tmp_path / "orders.db"))
+    try:
+        started = time.perf_counter()
+        assert service.update_once() == "changed"
+        elapsed = time.perf_counter() - started
+        # each site needs four requests to log in and fetch the page
+        assert elapsed < 4 * 0.2 * 1.75
+        assert fast.counts["logins"] == slow.counts["logins"] == 1
+
+        # both pages start at the same order numbers; the site keeps them apart
+        rows = service.read_conn.execute(
+            "SELECT site, COUNT(*) FROM current_orders WHERE active=1 GROUP BY site ORDER BY site"
+        ).fetchall()
+        assert rows == [("north", 20), ("south", 30)]
+
+        # a failing site leaves its own orders alone and does not stop the other
+        slow.error_rate = 1.0
+        clock.advance(60)
+        assert service.update_once() == "changed"
+        assert service.sites[1].page_cache.status == "failed"
+        assert _active_orders(service) == 50
+    finally:
+        service.pool.shutdown()
+        service.worker.stop()
+        service.worker.thread.join()
+        service.read_conn.close()
+        fast.stop()
+        slow.stop()
+
+
+@pytest.mark.parametrize(
+    "sites",
+    [
+        [{"base_url": "https://north.example.com"}, {"base_url": "https://south.example.com"}],
+        [{"name": "north"}, {"name": "north", "username": "plant2"}],
+        [{"name": " "}],
+    ],
+)
+def test_sites_need_unique_names(sites, tmp_path, monkeypatch):
+    # unnamed or repeated names would store both sites under one key
+    with pytest.raises(ValueError, match="Invalid sites"):
+        TrackerService(settings={"sites": sites}, db_file=str(tmp_path / "orders.db"))
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text(
+        json.dumps({"username": "demo", "password": "demo", "sites": sites})
+    )
+    assert main(["--headless"]) == 1
+    assert not (tmp_path / "orders.db").exists()
@@ -0,0 +1,63 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import Histogram, Metrics, metrics
+
+
+def test_histogram_keeps_recent_quantiles():
+    hist = Histogram(window=10)
+    for value in range(1, 21):
+        hist.observe(value)
+    assert hist.count == 20
+    assert hist.total == sum(range(1, 21))
+    # only 11..20 are left in the window
+    assert hist.quantile(0.5) == 15
+    assert hist.quantile(0.99) == 20
+    assert Histogram().quantile(0.5) is None
+
+
+def test_timer_counters_and_export(tmp_path):
+    m = Metrics()
+
+    @m.timed("fetch")
+    def fetch():
+        return "page"
+
+    assert fetch() == "page"
+    with m.timer("cycle"):
+        pass
+    m.inc("cycles")
+    m.inc("rows_parsed", 3)
+
+    snap = m.snapshot()
+    assert snap["counters"]["cycles"] == 1
+    assert snap["counters"]["rows_parsed"] == 3
+    assert snap["phases"]["fetch"]["count"] == 1
+    assert m.summary().startswith("cycle ")
+
+    text = m.prometheus()
+    assert "ybs_rows_parsed_total 3" in text
+    assert 'ybs_phase_seconds_count{phase="fetch"} 1' in text
+
+    path = tmp_path / "metrics.json"
+    m.write(str(path))
+    assert json.loads(path.read_text())["counters"]["cycles"] == 1
+    prom = tmp_path / "metrics.prom"
+    m.write(str(prom))
+    assert prom.read_text() == m.prometheus()
+
+
+def test_update_orders_records_phases(app, dummy_session):
+    metrics.reset()
+    html = """
+    <table>
+        <tr><td>YBS 1001</td><td>09/05/23 14:30</td><td></td><td></td><td></td><td></td></tr>
+    </table>
+    """
+    assert app.update_orders(dummy_session(html)) == 1
+    snap = metrics.snapshot()
+    assert set(snap["phases"]) >= {"fetch", "parse", "parse_datetime", "db_write"}
+    assert snap["counters"]["rows_parsed"] == 1
+    assert snap["counters"]["events_inserted"] == 1
@@ -0,0 +1,99 @@
+import csv
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import (
+    CURRENT_ORDERS_PAGE_SQL,
+    CURRENT_ORDERS_RANGE_SQL,
+    KeysetPager,
+    changes_since,
+    export_events,
+    latest_change,
+    prune_changes,
+)
+
+
+def _page(*orders, last_seen="2023-09-05 15:00:00"):
+    """Return the rows of a page listing ``orders``, ``(order_num, stations)`` pairs."""
+    events = [(num, ws, ts) for num, stations in orders for ws, ts in stations.items()]
+    return events, [(num, last_seen) for num, _ in orders]
+
+
+def _order(order_num, indigo=None):
+    return order_num, {"Indigo": indigo} if indigo else {}
+
+
+def _changes(conn, seq=0):
+    return conn.execute(
+        "SELECT order_num, kind FROM order_changes WHERE seq > ? ORDER BY seq", (seq,)
+    ).fetchall()
+
+
+def test_only_real_changes_are_logged(app):
+    app.write_orders(*_page(_order("1001"), _order("1002")))
+    assert _changes(app.conn) == [("1001", "insert"), ("1002", "insert")]
+
+    # seeing the same orders again only moves last_seen
+    seq = latest_change(app.conn)
+    app.write_orders(*_page(_order("1001"), _order("1002"), last_seen="x"))
+    assert latest_change(app.conn) == seq
+
+    app.write_orders(*_page(_order("1001", "2023-09-05 14:30:00")))
+    assert _changes(app.conn, seq) == [("1001", "update"), ("1002", "update")]
+    assert changes_since(app.conn, seq) == (seq + 2, {("1001", "default"), ("1002", "default")})
+    assert changes_since(app.conn, seq + 2) == (seq + 2, set())
+
+    # consumers further behind than the log reaches have to reload
+    assert prune_changes(app.conn, keep=1) == 3
+    assert changes_since(app.conn, seq)[1] is None
+    assert changes_since(app.conn, seq + 1) == (seq + 2, {("1002", "default")})
+
+
+def test_refresh_reads_only_changed_orders(app, fake_list):
+    app.write_orders(*_page(*(_order(f"{n}") for n in range(1000, 1030))))
+
+    app.order_tree = object()
+    app.order_tree_view = fake_list.view()
+    app.order_tree_pager = KeysetPager(
+        CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL, page_size=20
+    )
+    app.order_tree_seq = latest_change(app.read_conn)
+    rows = app.order_tree_pager.next_page(app.read_conn)
+    app.order_tree_view.merge(app._current_order_items(rows))
+    fake_list.ops.clear()
+
+    # 1005 moves on, 1025 (not loaded yet) too, and 1010 leaves the page
+    orders = [_order(f"{n}") for n in range(1000, 1030) if n != 1010]
+    orders[5] = _order("1005", "2023-09-05 14:30:00")
+    orders[24] = _order("1025", "2023-09-05 14:30:00")
+    app.write_orders(*_page(*orders))
+    statements = []
+    app.read_conn.set_trace_callback(statements.append)
+    app.populate_current_orders()
+    app.read_conn.set_trace_callback(None)
+
+    assert sorted(fake_list.ops) == [("update", ("1005", "default")), ("update", ("1010", "default"))]
+    assert [values[-1] for key, values in fake_list.items if key[0] == "1010"] == ["No"]
+    # one value per table column
+    assert {len(values) for _, values in fake_list.items} == {len(app._current_order_columns()[0])}
+    # no page of current_orders was read again
+    assert not [sql for sql in statements if "current_orders WHERE (order_num, site)" in sql]
+    assert app.order_tree_seq == latest_change(app.read_conn)
+
+
+def test_export_changed_since(app, tmp_path):
+    app.write_orders(
+        *_page(_order("1001", "2023-09-05 14:30:00"), _order("1002", "2023-09-05 15:30:00"))
+    )
+    seq = latest_change(app.conn)
+    app.write_orders(
+        *_page(
+            _order("1001", "2023-09-05 14:30:00"),
+            ("1002", {"Indigo": "2023-09-05 15:30:00", "Laminate": "2023-09-05 16:00:00"}),
+        )
+    )
+    path = str(tmp_path / "changes.csv")
+    assert export_events(app.conn, path, changed_since=seq) == 2
+    with open(path, newline="") as f:
+        assert {row[0] for row in list(csv.reader(f))[1:]} == {"1002"}
@@ -0,0 +1,55 @@
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import OrderIndex, prune_changes
+
+# the search box runs on every keystroke
+SEARCH_BUDGET_MS = 50
+
+
+def _write(app, order_nums):
+    events = [(n, "Indigo", "2023-09-05 14:30:00") for n in order_nums]
+    orders = [(n, "now") for n in order_nums]
+    app.write_orders(events, orders)
+
+
+def test_prefix_then_substring_matches(app):
+    _write(app, ["104512", "204510", "4510", "451000", "990000"])
+    index = OrderIndex().load(app.read_conn)
+    assert index.search("451") == ["4510", "451000", "104512", "204510"]
+    assert index.search("451", limit=3) == ["4510", "451000", "104512"]
+    assert index.search("99") == ["990000"]
+    assert index.search(" 0000 ") == ["990000"]
+    assert index.search("777") == []
+    assert index.search("") == []
+
+
+def test_update_follows_the_change_log(app):
+    _write(app, ["1001", "1002"])
+    index = OrderIndex().load(app.read_conn)
+    _write(app, ["1001", "1002", "2001"])
+    assert index.update(app.read_conn) == 1
+    assert index.keys == ["1001", "1002", "2001"]
+    assert index.search("2") == ["2001", "1002"]
+
+    # nothing new: nothing to do
+    assert index.update(app.read_conn) == 0
+
+    # too far behind the pruned log: loaded again
+    _write(app, ["3001"])
+    _write(app, ["4001"])
+    prune_changes(app.conn, keep=1)
+    index.update(app.read_conn)
+    assert index.keys == ["1001", "1002", "2001", "3001", "4001"]
+
+
+def test_search_is_fast_with_many_orders():
+    index = OrderIndex()
+    index.keys = [f"{n:06d}" for n in range(100000, 400000)]
+    index._reindex()
+    for text in ("1", "12345", "99999", "00000", "abc"):
+        started = time.perf_counter()
+        index.search(text)
+        assert (time.perf_counter() - started) * 1000 < SEARCH_BUDGET_MS
@@ -36,3 +36,16 @@ def test_unrecognized_format_logs_warning(caplog):
     with caplog.at_level(logging.WARNING):
         assert app.parse_datetime("invalid") is None
         assert any("Unrecognized" in record.getMessage() for record in caplog.records)
+
+
+def test_empty_cell_is_silent(caplog):
+    app = _get_app()
+    with caplog.at_level(logging.WARNING):
+        assert app.parse_datetime("") is None
+    assert not caplog.records
+
+
+def test_invalid_values_for_matching_shape():
+    app = _get_app()
+    assert app.parse_datetime("13/05/23 14:30") is None
+    assert app.parse_datetime("09/05/23 14:30 PM") is None
@@ -0,0 +1,42 @@
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import GUI_QUERIES, SCHEMA_MIGRATIONS, migrate
+
+FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+$")
+
+
+def _plan(conn, sql, params):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def test_migrate_sets_user_version():
+    conn = sqlite3.connect(":memory:")
+    assert migrate(conn) == len(SCHEMA_MIGRATIONS)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(SCHEMA_MIGRATIONS)
+    # running again is a no-op
+    assert migrate(conn) == len(SCHEMA_MIGRATIONS)
+
+
+@pytest.mark.parametrize("name", sorted(GUI_QUERIES))
+def test_gui_query_uses_index(name):
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.execute("ANALYZE")
+    sql, params = GUI_QUERIES[name]
+    plan = _plan(conn, sql, params)
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+    assert not [step for step in plan if "TEMP B-TREE" in step], plan
+
+
+def test_station_wip_reads_only_active_orders():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.execute("ANALYZE")
+    plan = _plan(conn, *GUI_QUERIES["station_wip"])
+    assert [step for step in plan if "idx_current_orders_active" in step], plan
@@ -0,0 +1,128 @@
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import (
+    ARCHIVE_MIGRATIONS,
+    TrackerService,
+    enable_incremental_vacuum,
+    export_events,
+    incremental_vacuum,
+    migrate,
+)
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def _orders(nums, last_seen):
+    events = [(n, "Indigo", f"2023-09-05 08:{i % 60:02d}:00") for i, n in enumerate(nums)]
+    orders = [(n, last_seen) for n in nums]
+    return events, orders
+
+
+@pytest.fixture
+def service(tmp_path):
+    settings = {"archive_batch_size": 2, "archive_after_days": 30}
+    service = TrackerService(settings=settings, db_file=str(tmp_path / "orders.db"))
+    old = [f"{n:04d}" for n in range(1000, 1005)]
+    recent = ["2000", "2001"]
+
+    def fill():
+        # five orders that left the page in 2023 and two still on it
+        service.write_orders(*_orders(old, "2023-10-01 09:00:00"))
+        service.write_orders(*_orders(recent, "2024-06-01 11:00:00"))
+
+    service.worker.submit(fill).result()
+    yield service
+    service.retention.stop()
+    service.worker.stop()
+    service.worker.thread.join()
+    service.read_conn.close()
+
+
+def _count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_old_inactive_orders_move_to_archive(service):
+    conn = service.read_conn
+    assert _count(conn, "main.current_orders") == 7
+
+    assert service.retention.run_once(NOW) == 5
+    assert _count(conn, "main.current_orders") == 2
+    assert _count(conn, "main.events") == 2
+    assert _count(conn, "archive.current_orders") == 5
+    assert _count(conn, "archive.order_stations") == 5
+    assert _count(conn, "archive.stage_durations") == 5
+    # active orders are never archived
+    assert service.retention.run_once(NOW) == 0
+
+    # the space was handed back
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+
+def test_archived_orders_stay_queryable(service, tmp_path):
+    service.retention.run_once(NOW)
+    assert service.get_order_data("1000") == []
+    assert service.get_order_data("1000", archived=True) == [("default", "Indigo", "09/05/23 08:00", None)]
+    assert _count(service.read_conn, "all_current_orders") == 7
+
+    path = str(tmp_path / "out.csv")
+    assert export_events(service.read_conn, path) == 2
+    assert export_events(service.read_conn, path, archived=True) == 7
+
+
+def test_archive_from_before_order_stations_is_migrated(tmp_path):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("ATTACH DATABASE ? AS archive", (str(tmp_path / "orders-archive.db"),))
+    conn.executescript(ARCHIVE_MIGRATIONS[0])
+    conn.execute(
+        """
+        INSERT INTO archive.current_orders(order_num, indigo, last_seen, active)
+        VALUES('0999', '2023-01-02 08:00:00', '2023-01-03 08:00:00', 0)
+        """
+    )
+    conn.commit()
+    conn.close()
+
+    service = TrackerService(settings={}, db_file=str(tmp_path / "orders.db"))
+    try:
+        assert service.read_conn.execute(
+            "SELECT order_num, workstation, timestamp FROM all_order_stations"
+        ).fetchall() == [("0999", "Indigo", "2023-01-02 08:00:00")]
+        assert _count(service.read_conn, "all_current_orders") == 1
+    finally:
+        service.worker.stop()
+        service.worker.thread.join()
+        service.read_conn.close()
+
+
+def test_older_database_is_not_rebuilt_while_polling(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.executemany("INSERT INTO events(order_num) VALUES(?)", [(str(n),) for n in range(5000)])
+    conn.commit()
+    conn.execute("DELETE FROM events")
+    conn.commit()
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert incremental_vacuum(conn) is None
+    assert not [sql for sql in statements if sql.startswith("VACUUM")]
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    conn.close()
+
+    # the one-off conversion behind --vacuum
+    assert enable_incremental_vacuum(path)
+    assert not enable_incremental_vacuum(path)
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    assert incremental_vacuum(conn) == 0
+    conn.close()
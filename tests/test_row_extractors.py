@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import ROW_EXTRACTORS, column_map, extract_rows_bs4
+
+
+def _page(count):
+    rows = [
+        "<tr><th>Order</th><th>Indigo</th><th>Laminate</th>"
+        "<th>Die Cutting ABG</th><th>Machine Glue</th><th>Shipping</th></tr>",
+        "<tr><td>Notes</td><td colspan='5'>not an order</td></tr>",
+        "<tr><td>YBS</td><td></td></tr>",
+    ]
+    for i in range(count):
+        rows.append(
+            f"<tr>\n  <td> YBS {1000 + i} <!-- id --></td>"
+            f"<td>09/{i % 28 + 1:02d}/23 14:30</td>"
+            f"<td><span>09/05/2023</span> 2:{i % 60:02d} PM</td>"
+            "<td>&nbsp;</td><td></td>"
+            f"<td>Ship &amp; <b>done</b> {i}</td></tr>"
+        )
+    return "<html><body><table>" + "\n".join(rows) + "</table></body></html>"
+
+
+@pytest.mark.parametrize("engine", sorted(set(ROW_EXTRACTORS) - {"bs4"}))
+def test_extractor_matches_beautifulsoup(engine):
+    # large enough to span several chunks of the streaming parsers
+    html = _page(2000)
+    expected = list(extract_rows_bs4(html))
+    assert len(expected) == 2000
+    assert list(ROW_EXTRACTORS[engine](html)) == expected
+
+
+@pytest.mark.parametrize("engine", sorted(ROW_EXTRACTORS))
+def test_columns_follow_the_header(engine):
+    # stations in another order and a column the tracker does not know about;
+    # the second table has no header and is read by position again
+    html = (
+        "<table><tr><th>Order</th><th>Laminate</th><th> indigo </th><th>Notes</th>"
+        "<th>Shipping</th></tr>"
+        "<tr><td>YBS 1001</td><td>09/05/23 15:00</td><td>09/05/23 14:30</td>"
+        "<td>rush</td><td></td></tr></table>"
+        "<table><tr><td>YBS 1002</td><td>09/06/23 08:00</td><td>09/06/23 09:00</td>"
+        "<td>09/06/23 10:00</td></tr></table>"
+    )
+    stations = ("Indigo", "Laminate", "Shipping")
+    assert column_map(("Order", "Laminate", " indigo ", "Notes", "Shipping"), stations) == (
+        2,
+        1,
+        4,
+    )
+    assert list(ROW_EXTRACTORS[engine](html, stations)) == [
+        ("1001", ["09/05/23 14:30", "09/05/23 15:00", ""]),
+        ("1002", ["09/06/23 08:00", "09/06/23 09:00", "09/06/23 10:00"]),
+    ]
+
+
+@pytest.mark.parametrize("engine", sorted(ROW_EXTRACTORS))
+def test_unmatched_header_is_read_by_position(engine, caplog):
+    html = (
+        "<table><tr><th>Order</th><th>Indigo Done</th><th>Lam</th></tr>"
+        "<tr><td>YBS 1001</td><td>09/05/23 14:30</td><td>09/05/23 15:00</td></tr></table>"
+    )
+    stations = ("Indigo", "Laminate")
+    for _ in range(2):
+        assert list(ROW_EXTRACTORS[engine](html, stations)) == [
+            ("1001", ["09/05/23 14:30", "09/05/23 15:00"])
+        ]
+    # logged for every page, not just the first
+    assert len([r for r in caplog.records if "not found in the table header" in r.message]) == 2
@@ -0,0 +1,53 @@
+import sys
+import threading
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import PollScheduler
+
+
+def test_failures_back_off_with_jitter():
+    scheduler = PollScheduler(lambda manual: "failed", interval=60, max_backoff=900, rand=lambda: 1.0)
+    assert scheduler.step() == 120
+    assert scheduler.step() == 240
+    for _ in range(5):
+        delay = scheduler.step()
+    assert delay == 900
+
+    scheduler.random = lambda: 0.0
+    assert scheduler.next_delay() == 450
+
+    scheduler.cycle = lambda manual: "changed"
+    assert scheduler.step() == 60
+
+
+def test_unchanged_pages_stretch_interval():
+    scheduler = PollScheduler(lambda manual: "unchanged", interval=60, max_interval=600, idle_after=3)
+    assert [scheduler.step() for _ in range(6)] == [60, 60, 120, 240, 480, 600]
+    scheduler.cycle = lambda manual: "changed"
+    assert scheduler.step() == 60
+
+
+def test_trigger_merges_into_running_cycle():
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def cycle(manual):
+        calls.append(manual)
+        started.set()
+        release.wait(5)
+        return "changed"
+
+    scheduler = PollScheduler(cycle)
+    worker = threading.Thread(target=scheduler.step)
+    worker.start()
+    started.wait(5)
+    assert not scheduler.trigger()
+    release.set()
+    worker.join(5)
+    assert calls == [False]
+
+    assert scheduler.trigger()
+    scheduler.step()
+    assert calls == [False, True]
@@ -0,0 +1,120 @@
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import OrderTracker
+from OrderTracker import SessionManager, Site, YBSScraperApp
+
+
+class CountingLogin:
+    def __init__(self, result=True):
+        self.calls = 0
+        self.result = result
+
+    def __call__(self, session, **kwargs):
+        self.calls += 1
+        return self.result
+
+
+def test_session_reused_until_invalidated():
+    login = CountingLogin()
+    manager = SessionManager(login)
+    first = manager.get()
+    assert manager.get() is first
+    assert login.calls == 1
+
+    manager.invalidate()
+    assert manager.get() is first
+    assert login.calls == 2
+
+
+def test_failed_login_returns_none():
+    login = CountingLogin(result=False)
+    manager = SessionManager(login)
+    assert manager.get() is None
+    assert manager.get() is None
+    assert login.calls == 2
+
+
+def test_reset_leaves_the_old_session_open():
+    manager = SessionManager(CountingLogin())
+    first = manager.get()
+    first.close = lambda: pytest.fail("a running cycle may still use this session")
+    manager.reset()
+    assert manager.get() is not first
+
+
+class _App:
+    """Just enough of YBSScraperApp for ``test_login``."""
+
+    def __init__(self, settings, result, profile=None):
+        self.settings = settings
+        self.sites = [Site(profile or {"name": "default"}, settings, CountingLogin())]
+        self.sessions = self.sites[0].sessions
+        self.polling = self.sessions.get()
+        self.result = result
+        self.shown = []
+        self.done = threading.Event()
+        for name, value in settings.items():
+            setattr(self, name, SimpleNamespace(get=lambda value=value: value))
+
+    def do_login(self, session, **details):
+        return self.result
+
+    def call_in_ui(self, fn, *args):
+        self.shown.append(fn)
+        self.done.set()
+
+
+@pytest.fixture
+def dialogs(monkeypatch):
+    dialogs = SimpleNamespace(showinfo="info", showerror="error")
+    monkeypatch.setattr(OrderTracker, "messagebox", dialogs)
+    return dialogs
+
+
+@pytest.mark.parametrize("unsaved", [False, True])
+def test_login_test_keeps_the_polling_session(dialogs, unsaved):
+    settings = {"username": "demo", "password": "demo", "base_url": "http://ybs"}
+    app = _App(settings, result=True)
+    if unsaved:
+        # the form holds details that were not saved
+        app.username = SimpleNamespace(get=lambda: "other")
+    YBSScraperApp.test_login(app)
+    assert app.done.wait(5)
+    assert app.shown == ["info"]
+    # only a login with the saved details may replace the polling session
+    assert (app.sessions.get() is app.polling) == unsaved
+    assert app.sessions.logged_in
+
+
+@pytest.mark.parametrize("override", ["username", "password", "base_url"])
+def test_login_test_keeps_a_site_with_other_details(dialogs, override):
+    # the form shows the top-level details, the first site overrides one
+    settings = {"username": "demo", "password": "demo", "base_url": "http://ybs"}
+    app = _App(settings, result=True, profile={"name": "north", override: "north"})
+    YBSScraperApp.test_login(app)
+    assert app.done.wait(5)
+    assert app.shown == ["info"]
+    assert app.sessions.get() is app.polling
+
+
+def test_failed_login_test_keeps_the_polling_session(dialogs):
+    app = _App({"username": "demo", "password": "demo", "base_url": "http://ybs"}, False)
+    YBSScraperApp.test_login(app)
+    assert app.done.wait(5)
+    assert app.shown == ["error"]
+    assert app.sessions.get() is app.polling
+
+
+def test_login_test_does_not_use_the_database_worker(dialogs):
+    app = _App({"username": "demo", "password": "demo", "base_url": "http://ybs"}, True)
+    threads = []
+    app.do_login = lambda session, **details: threads.append(threading.current_thread()) or True
+    YBSScraperApp.test_login(app)
+    assert app.done.wait(5)
+    assert threads[0].name == "login-test"
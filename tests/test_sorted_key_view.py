@@ -0,0 +1,54 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from OrderTracker import (
+    CURRENT_ORDERS_PAGE_SQL,
+    CURRENT_ORDERS_RANGE_SQL,
+    KeysetPager,
+    migrate,
+)
+
+
+def test_only_changed_rows_touch_the_widget(fake_list):
+    view = fake_list.view()
+    assert view.apply([("1002", ("b",)), ("1001", ("a",)), ("1003", ("c",))]) == (3, 0, 0)
+    assert [k for k, _ in fake_list.items] == ["1001", "1002", "1003"]
+
+    fake_list.ops.clear()
+    counts = view.apply([("1001", ("a",)), ("1003", ("C",)), ("1000", ("z",))])
+    assert counts == (1, 1, 1)
+    assert sorted(fake_list.ops) == [("delete", "1002"), ("insert", "1000"), ("update", "1003")]
+    assert fake_list.items == [("1000", ("z",)), ("1001", ("a",)), ("1003", ("C",))]
+    assert view.index("1003") == 2
+    assert view.index("1002") is None
+
+
+def test_keyset_pager_loads_pages_in_order():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO current_orders(order_num, last_seen) VALUES(?, 'now')",
+        [(f"{n:04d}",) for n in range(25)],
+    )
+    pager = KeysetPager(CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL, page_size=10)
+    pages = [pager.next_page(conn) for _ in range(3)]
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert pager.exhausted
+    assert pager.next_page(conn) == []
+
+    conn.execute("INSERT INTO current_orders(order_num, last_seen) VALUES('9999', 'now')")
+    assert [row[0] for row in pager.loaded_rows(conn)][-2:] == ["0024", "9999"]
+
+
+def test_loaded_rows_stop_at_last_page():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO current_orders(order_num, last_seen) VALUES(?, 'now')",
+        [(f"{n:04d}",) for n in range(25)],
+    )
+    pager = KeysetPager(CURRENT_ORDERS_PAGE_SQL, CURRENT_ORDERS_RANGE_SQL, page_size=10)
+    pager.next_page(conn)
+    assert [row[0] for row in pager.loaded_rows(conn)] == [f"{n:04d}" for n in range(10)]
@@ -0,0 +1,126 @@
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+import OrderTracker
+from OrderTracker import TrackerService, YBSScraperApp, main
+
+# generous budget for slow CI machines; painting 50k orders from the DB takes
+# a few milliseconds when the queries are indexed
+FIRST_PAINT_BUDGET_MS = 1500
+
+
+class FakeWidget:
+    """Stands in for the Tk widgets; keeps the text written to it."""
+
+    def __init__(self, *args, **kwargs):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text = text + self.text if index in (0, "1.0") else self.text + text
+
+    def delete(self, first, last=None):
+        self.text = ""
+
+    def get(self, first=None, last=None):
+        return self.text
+
+    def __getattr__(self, name):
+        # pack, grid, config, see, ...
+        return lambda *args, **kwargs: None
+
+
+class FakeVar:
+    def __init__(self, value=""):
+        self.value = value
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def title(self, text):
+        pass
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+        return len(self.scheduled)
+
+    def update_idletasks(self):
+        pass
+
+    def withdraw(self):
+        pass
+
+    def destroy(self):
+        self.destroyed = True
+
+
+@pytest.fixture
+def fake_tk(monkeypatch):
+    tk = SimpleNamespace(
+        END="end", Frame=FakeWidget, Label=FakeWidget, Entry=FakeWidget, Button=FakeWidget, StringVar=FakeVar
+    )
+    monkeypatch.setattr(OrderTracker, "tk", tk)
+    monkeypatch.setattr(OrderTracker, "scrolledtext", SimpleNamespace(ScrolledText=FakeWidget))
+
+
+def test_first_paint_uses_cached_data(fake_tk, tmp_path, monkeypatch):
+    db_file = str(tmp_path / "orders.db")
+    service = TrackerService(settings={}, db_file=db_file)
+
+    def fill():
+        service.conn.executemany(
+            "INSERT INTO events(order_num, workstation, timestamp) VALUES(?, 'Shipping', ?)",
+            ((f"{n:06d}", f"2023-09-05 {n % 24:02d}:{n % 60:02d}:00") for n in range(50000)),
+        )
+        service.conn.execute(
+            "INSERT INTO events(order_num, workstation, timestamp)"
+            " VALUES('999999', 'Indigo', '2024-01-01 08:00:00')"
+        )
+        service.conn.commit()
+
+    service.worker.submit(fill).result()
+    service.worker.stop()
+
+    # startup must not wait for the network
+    network = []
+    monkeypatch.setattr(OrderTracker.PollScheduler, "start", lambda self, delay=0: network.append(delay))
+    monkeypatch.setattr(OrderTracker.Retention, "start", lambda self: None)
+
+    root = FakeRoot()
+    app = YBSScraperApp(root, settings={"username": "u", "password": "p"}, db_file=db_file)
+    try:
+        assert app.first_paint_ms < FIRST_PAINT_BUDGET_MS
+        assert app.log_text.get("1.0", "2.0").startswith("999999 - Indigo")
+        assert app.last_order_entry.get() == "999999"
+        assert app.status_var.get() == "Showing saved data; fetching orders..."
+        # the first fetch and the embedded browser are only scheduled after painting
+        assert network == [0]
+        assert (100, app.show_manage_page) in root.scheduled
+    finally:
+        app.worker.stop()
+
+
+def test_invalid_sites_are_reported_in_a_dialog(fake_tk, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text(json.dumps({"sites": [{"name": "north"}, {}]}))
+    root = FakeRoot()
+    errors = []
+    monkeypatch.setattr(OrderTracker.tk, "Tk", lambda: root, raising=False)
+    monkeypatch.setattr(
+        OrderTracker, "messagebox", SimpleNamespace(showerror=lambda *args: errors.append(args))
+    )
+    assert main([]) == 1
+    assert errors and "site 2 has no name" in errors[0][1]
+    assert root.destroyed
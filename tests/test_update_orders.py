@@ -1,66 +1,22 @@
+import csv
 import sqlite3
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 sys.path.append(str(Path(__file__).resolve().parents[1]))
-from OrderTracker import YBSScraperApp, WORKSTATIONS
+import OrderTracker
+from OrderTracker import SCHEMA_MIGRATIONS, Site, migrate
 
 
-def _get_app():
-    app = YBSScraperApp.__new__(YBSScraperApp)
-    app.settings = {"base_url": "http://example.com"}
-    app.conn = sqlite3.connect(":memory:")
-    cur = app.conn.cursor()
-    cur.execute(
-        """
-        CREATE TABLE events (
-            order_num TEXT,
-            workstation TEXT,
-            timestamp TEXT,
-            UNIQUE(order_num, workstation, timestamp)
-        )
-        """
-    )
-    cur.execute(
-        """
-        CREATE TABLE current_orders (
-            order_num TEXT PRIMARY KEY,
-            indigo TEXT,
-            laminate TEXT,
-            die_cutting_abg TEXT,
-            machine_glue TEXT,
-            shipping TEXT,
-            last_seen TEXT,
-            active INTEGER DEFAULT 1
-        )
-        """
-    )
-    app.conn.commit()
-    return app
-
-
-class DummyResponse:
-    def __init__(self, text):
-        self.text = text
-
-
-class DummySession:
-    def __init__(self, text):
-        self.text = text
-
-    def get(self, url):
-        return DummyResponse(self.text)
-
-
-def test_update_and_deactivate():
+def test_update_and_deactivate(app, dummy_session):
     html1 = """
     <table>
         <tr><td>YBS 1001</td><td>09/05/23 14:30</td><td></td><td></td><td></td><td></td></tr>
         <tr><td>YBS 1002</td><td></td><td></td><td></td><td></td><td></td></tr>
     </table>
     """
-    app = _get_app()
-    session = DummySession(html1)
+    session = dummy_session(html1)
     count = app.update_orders(session)
     assert count == 1
 
@@ -73,12 +29,15 @@ def test_update_and_deactivate():
         <tr><td>YBS 1001</td><td>09/05/23 14:35</td><td></td><td></td><td></td><td></td></tr>
     </table>
     """
-    session2 = DummySession(html2)
+    session2 = dummy_session(html2)
     count2 = app.update_orders(session2)
     assert count2 == 1
 
     row1 = cur.execute(
-        "SELECT indigo, active FROM current_orders WHERE order_num='1001'"
+        """
+        SELECT timestamp, active FROM current_orders JOIN order_stations USING (order_num, site)
+        WHERE order_num='1001' AND workstation='Indigo'
+        """
     ).fetchone()
     assert row1[1] == 1
     assert "14:35" in row1[0]
@@ -88,3 +47,155 @@ def test_update_and_deactivate():
     ).fetchone()
     assert row2[0] == 0
 
+
+def test_unchanged_page_skips_parse_and_writes(app, dummy_session):
+    html = """
+    <table>
+        <tr><td>YBS 1001</td><td>09/05/23 14:30</td><td></td><td></td><td></td><td></td></tr>
+    </table>
+    """
+    assert app.update_orders(dummy_session(html)) == 1
+    assert app.page_cache.changed
+
+    # a vanished order would be deactivated if the page were processed again
+    app.conn.execute("UPDATE current_orders SET active=0")
+    assert app.update_orders(dummy_session(html)) == 0
+    assert not app.page_cache.changed
+    assert app.page_cache.skipped == 1
+    assert app.conn.execute("SELECT active FROM current_orders").fetchone() == (0,)
+
+
+def test_stage_durations_follow_new_events(app, dummy_session):
+    html1 = """
+    <table>
+        <tr><td>YBS 1001</td><td>09/05/23 08:00</td><td>09/05/23 10:30</td><td></td><td></td><td></td></tr>
+    </table>
+    """
+    app.update_orders(dummy_session(html1))
+    assert app.get_order_data("1001") == [
+        ("default", "Indigo", "09/05/23 08:00", 2.5),
+        ("default", "Laminate", "09/05/23 10:30", None),
+    ]
+
+    html2 = """
+    <table>
+        <tr><td>YBS 1001</td><td>09/05/23 08:00</td><td>09/05/23 10:30</td><td>09/05/23 11:00</td><td></td><td></td></tr>
+    </table>
+    """
+    assert app.update_orders(dummy_session(html2)) == 1
+    assert app.get_order_data("1001") == [
+        ("default", "Indigo", "09/05/23 08:00", 2.5),
+        ("default", "Laminate", "09/05/23 10:30", 0.5),
+        ("default", "Die Cutting ABG", "09/05/23 11:00", None),
+    ]
+    assert app.get_order_data("9999") == []
+
+
+def test_stage_durations_backfilled_by_migration():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA_MIGRATIONS[0])
+    conn.executemany(
+        "INSERT INTO events VALUES('1001', ?, ?)",
+        [("Laminate", "2023-09-05 10:30:00"), ("Indigo", "2023-09-05 08:00:00")],
+    )
+    conn.execute("PRAGMA user_version = 1")
+    migrate(conn)
+    rows = conn.execute(
+        "SELECT workstation, hours FROM stage_durations ORDER BY timestamp"
+    ).fetchall()
+    assert rows == [("Indigo", 2.5), ("Laminate", None)]
+
+
+def test_station_columns_normalized_by_migration():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn, SCHEMA_MIGRATIONS[:7])
+    conn.execute(
+        """
+        INSERT INTO current_orders(order_num, indigo, laminate, last_seen, active)
+        VALUES('1001', '2023-09-05 08:00:00', '2023-09-05 10:30:00', 'now', 0)
+        """
+    )
+    migrate(conn)
+    assert conn.execute(
+        "SELECT order_num, workstation, timestamp FROM order_stations ORDER BY timestamp"
+    ).fetchall() == [
+        ("1001", "Indigo", "2023-09-05 08:00:00"),
+        ("1001", "Laminate", "2023-09-05 10:30:00"),
+    ]
+    assert conn.execute("SELECT * FROM current_orders").fetchall() == [
+        ("default", "1001", "now", 0)
+    ]
+
+
+def test_unchanged_stations_are_not_rewritten(app, dummy_session):
+    html = """
+    <table>
+        <tr><th>Order</th><th>Indigo</th><th>Laminate</th><th>Die Cutting ABG</th>
+            <th>Machine Glue</th><th>Shipping</th><th>Operator</th></tr>
+        <tr><td>YBS 1001</td><td>09/05/23 08:00</td><td>09/05/23 10:30</td><td></td><td></td><td></td><td>Ann</td></tr>
+    </table>
+    """
+    assert app.update_orders(dummy_session(html)) == 2
+    changes = app.conn.execute("SELECT COUNT(*) FROM order_changes").fetchone()[0]
+    app.conn.executescript(
+        """
+        CREATE TEMP TABLE station_writes(n);
+        CREATE TEMP TRIGGER count_station_writes AFTER UPDATE ON main.order_stations
+        BEGIN INSERT INTO station_writes VALUES(1); END;
+        """
+    )
+    # the page changed elsewhere, so it is parsed and written again
+    app.update_orders(dummy_session(html + "<p>refreshed</p>"))
+    assert app.conn.execute("SELECT COUNT(*) FROM station_writes").fetchone()[0] == 0
+    assert app.conn.execute("SELECT COUNT(*) FROM order_changes").fetchone()[0] == changes
+
+    # a station dropping off the page is removed, the others stay as they are
+    app.update_orders(dummy_session(html.replace("09/05/23 10:30", "")))
+    assert app.conn.execute(
+        "SELECT workstation FROM order_stations WHERE order_num='1001'"
+    ).fetchall() == [("Indigo",)]
+    assert app.conn.execute("SELECT COUNT(*) FROM order_changes").fetchone()[0] == changes + 1
+
+
+def test_unmatched_header_keeps_stations(app, dummy_session):
+    row = "<tr><td>YBS 1001</td><td>09/05/23 08:00</td><td>09/05/23 10:30</td><td></td><td></td><td></td></tr>"
+    app.update_orders(dummy_session(f"<table>{row}</table>"))
+    # a header renamed on the site must not wipe the stations
+    header = "<tr><th>Order</th>" + "<th>Done</th>" * 5 + "</tr>"
+    app.update_orders(dummy_session(f"<table>{header}{row}</table>"))
+    assert app.conn.execute(
+        "SELECT workstation FROM order_stations WHERE order_num='1001' ORDER BY timestamp"
+    ).fetchall() == [("Indigo",), ("Laminate",)]
+
+
+def test_rows_are_stored_under_the_first_site(app, dummy_session):
+    app.sites = [Site({"name": "north"}, app.settings, app.do_login)]
+    html = "<table><tr><td>YBS 1001</td><td>09/05/23 08:00</td><td></td><td></td><td></td><td></td></tr></table>"
+    assert app.update_orders(dummy_session(html)) == 1
+    assert app.sites[0].page_cache.changed
+    for table in ("events", "current_orders", "order_stations"):
+        assert app.conn.execute(f"SELECT DISTINCT site FROM {table}").fetchall() == [("north",)]
+
+
+def test_order_history_names_the_site(app, tmp_path, monkeypatch):
+    # the same order number at two plants
+    app.write_orders([("1001", "Indigo", "2023-09-05 08:00:00")], [("1001", "x")], "north")
+    app.write_orders([("1001", "Indigo", "2023-09-06 09:00:00")], [("1001", "x")], "south")
+    assert app.get_order_data("1001") == [
+        ("north", "Indigo", "09/05/23 08:00", None),
+        ("south", "Indigo", "09/06/23 09:00", None),
+    ]
+
+    path = tmp_path / "1001.csv"
+    monkeypatch.setattr(
+        OrderTracker, "filedialog", SimpleNamespace(asksaveasfilename=lambda **kwargs: str(path))
+    )
+    monkeypatch.setattr(OrderTracker, "messagebox", SimpleNamespace(showinfo=lambda *args: None))
+    app.export_order("1001")
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [
+        ["Site", "Workstation", "Completed", "Time At Station (hours)"],
+        ["north", "Indigo", "09/05/23 08:00", ""],
+        ["south", "Indigo", "09/06/23 09:00", ""],
+    ]